@@ -1,29 +1,82 @@
 import cv2
 import numpy as np
-from collections import deque
+from math import atan2, degrees, hypot
 import time
+from collections import OrderedDict
+
+# Gaze labels indexed by [looking right][offset level]
+_GAZE_LABELS = (
+    ('Center', 'Slightly Left', 'Looking Left'),
+    ('Center', 'Slightly Right', 'Looking Right'),
+)
+
+# Blink state is kept in fixed-size arrays with one row (slot) per tracked face
+MAX_TRACKED_FACES = 32
+
+class ExprState:
+    """Per-face expression tracking record"""
+    __slots__ = ('current', 'confidence', 'duration', 'changes', 'last_change_time')
+
+    def __init__(self, current, confidence, last_change_time):
+        self.current = current
+        self.confidence = confidence
+        self.duration = 0
+        self.changes = 0
+        self.last_change_time = last_change_time
+
+    def to_dict(self):
+        """Expression stats in the shape returned to API clients"""
+        return {
+            'current': self.current,
+            'confidence': self.confidence,
+            'duration': self.duration,
+            'changes': self.changes,
+            'last_change_time': self.last_change_time
+        }
+
+def _eye_aspect_ratio(lex, ley, rex, rey, lcy):
+    """Simplified EAR from raw eye coordinates (0.3 when the eye points coincide)"""
+    horizontal_dist = hypot(lex - rex, ley - rey)
+    return abs(ley - lcy) / horizontal_dist if horizontal_dist > 0 else 0.3
+
+def _gaze_offset_ratio(lex, rex, fx, fw):
+    """Offset of the eye midpoint from the face center, in half face-widths"""
+    if fw <= 0:
+        return 0
+    return ((lex + rex) * 0.5 - (fx + fw * 0.5)) / (fw * 0.5)
 
 class AdvancedFaceTracker:
     def __init__(self):
-        self.blink_history = {}  # Track blinks per face
+        # face_id -> slot in the blink state arrays, least recently seen first
+        self.blink_history = OrderedDict()
+        self._free_blink_slots = list(range(MAX_TRACKED_FACES))
+        self.closed_run = np.zeros(MAX_TRACKED_FACES, np.int32)  # Consecutive frames below threshold
+        self.blink_count = np.zeros(MAX_TRACKED_FACES, np.int32)
+        self.frames_seen = np.zeros(MAX_TRACKED_FACES, np.int32)  # Per-face frame counter
+        self.last_blink_frame = np.zeros(MAX_TRACKED_FACES, np.int32)
         self.gaze_history = {}   # Track gaze direction
-        self.expression_history = {}  # Track expression over time
+        self.expression_history = {}  # face_id -> ExprState
         self.quality_metrics = {}  # Track face quality
         
-    def estimate_age_gender(self, face_roi):
-        """Estimate age and gender from face region"""
+    def estimate_age_gender(self, gray_roi):
+        """Estimate age and gender from a single-channel (grayscale) face region"""
         # Simplified estimation based on facial features
         # Real implementation would use a trained model
-        
-        gray = cv2.cvtColor(face_roi, cv2.COLOR_BGR2GRAY) if len(face_roi.shape) == 3 else face_roi
+        gray = gray_roi
         
         # Analyze facial features for age estimation
         # This is a simplified heuristic-based approach
         h, w = gray.shape
         
         # Estimate based on face proportions and texture
-        # Younger faces tend to have smoother skin, older faces have more texture
-        laplacian_var = cv2.Laplacian(gray, cv2.CV_64F).var()
+        # Younger faces tend to have smoother skin, older faces have more texture.
+        # Texture is measured on a fixed 64x64 thumbnail: ~10x fewer pixels for
+        # typical ROIs, and the score no longer depends on how large the face is
+        if h > 0 and w > 0:
+            thumb = cv2.resize(gray, (64, 64), interpolation=cv2.INTER_AREA)
+            laplacian_var = float(cv2.Laplacian(thumb, cv2.CV_16S).var())
+        else:
+            laplacian_var = 0.0
         
         # Simplified age estimation (would need ML model for accuracy)
         if laplacian_var < 100:
@@ -63,55 +116,65 @@ class AdvancedFaceTracker:
         left_corner = landmarks.get('left_eye_corner', (0, 0))
         right_corner = landmarks.get('right_eye_corner', (0, 0))
         
-        # Calculate distances
-        def distance(p1, p2):
-            return np.sqrt((p1[0] - p2[0])**2 + (p1[1] - p2[1])**2)
-        
-        # Simplified EAR calculation
-        vertical_dist = abs(left_eye[1] - left_corner[1])
-        horizontal_dist = distance(left_eye, right_eye)
-        
-        if horizontal_dist > 0:
-            ear = vertical_dist / horizontal_dist
-        else:
-            ear = 0.3
+        # Simplified EAR calculation (plain scalar math, no numpy dispatch)
+        ear = _eye_aspect_ratio(left_eye[0], left_eye[1], right_eye[0], right_eye[1], left_corner[1])
         
         # Blink threshold (simplified)
         blink_threshold = 0.2
         
         # Track blink history
-        if face_id not in self.blink_history:
-            self.blink_history[face_id] = {
-                'ear_history': deque(maxlen=10),
-                'blink_count': 0,
-                'last_blink_time': 0
-            }
+        slot = self.blink_history.get(face_id)
+        if slot is None:
+            slot = self._assign_blink_slot(face_id)
+        else:
+            self.blink_history.move_to_end(face_id)
         
-        history = self.blink_history[face_id]
-        history['ear_history'].append(ear)
+        # Only "last 3 EARs below threshold" is ever checked, so a run length
+        # of consecutive closed frames replaces the per-face EAR history
+        if ear < blink_threshold:
+            self.closed_run[slot] += 1
+        else:
+            self.closed_run[slot] = 0
+        
+        # detect_blink runs once per frame for each face, so this face's frame
+        # counter stands in for wall-clock time (no time syscall per face)
+        self.frames_seen[slot] += 1
         
         # Detect blink (EAR drops below threshold)
         blinked = False
-        if len(history['ear_history']) >= 3:
-            recent_ears = list(history['ear_history'])[-3:]
-            if all(e < blink_threshold for e in recent_ears):
-                # Check if enough time has passed since last blink
-                current_time = time.time()
-                if current_time - history['last_blink_time'] > 0.3:  # 300ms debounce
-                    history['blink_count'] += 1
-                    history['last_blink_time'] = current_time
-                    blinked = True
+        if self.closed_run[slot] >= 3:
+            # Check if enough frames have passed since last blink
+            if self.frames_seen[slot] - self.last_blink_frame[slot] > 9:  # ~300ms debounce at 30 fps
+                self.blink_count[slot] += 1
+                self.last_blink_frame[slot] = self.frames_seen[slot]
+                blinked = True
         
         # Note: This is a simplified blink detection
         # The accurate count comes from individual_eyes.synchronized_blink_count
         return {
             'blinked': blinked,
             'ear': round(ear, 3),
-            'blink_count': history['blink_count'],  # Legacy - use synchronized_blink_count from individual_eyes instead
+            'blink_count': int(self.blink_count[slot]),  # Legacy - use synchronized_blink_count from individual_eyes instead
             'eyes_closed': ear < blink_threshold,
             'note': 'Use synchronized_blink_count from individual_eyes for accurate count'
         }
     
+    def _assign_blink_slot(self, face_id):
+        """Claim a blink state slot for a face: a free one, else the least recently seen face's"""
+        # Reclaiming by recency (not assignment order) keeps a long-lived face's
+        # state while short-lived detections churn through new IDs
+        if self._free_blink_slots:
+            slot = self._free_blink_slots.pop()
+        else:
+            _, slot = self.blink_history.popitem(last=False)
+        
+        self.blink_history[face_id] = slot
+        self.closed_run[slot] = 0
+        self.blink_count[slot] = 0
+        self.frames_seen[slot] = 0
+        self.last_blink_frame[slot] = -10
+        return slot
+    
     def estimate_gaze_direction(self, landmarks, face_box):
         """Estimate gaze direction based on eye position"""
         if not landmarks:
@@ -120,23 +183,13 @@ class AdvancedFaceTracker:
         left_eye = landmarks.get('left_eye', (0, 0))
         right_eye = landmarks.get('right_eye', (0, 0))
         
-        # Calculate eye center
-        eye_center_x = (left_eye[0] + right_eye[0]) / 2
-        face_center_x = face_box[0] + face_box[2] / 2
-        
-        # Calculate offset
-        offset = eye_center_x - face_center_x
-        offset_ratio = offset / (face_box[2] / 2) if face_box[2] > 0 else 0
-        
-        # Determine gaze direction
-        if abs(offset_ratio) < 0.1:
-            direction = 'Center'
-        elif offset_ratio > 0.2:
-            direction = 'Looking Right'
-        elif offset_ratio < -0.2:
-            direction = 'Looking Left'
-        else:
-            direction = 'Slightly ' + ('Right' if offset_ratio > 0 else 'Left')
+        # Offset of the eye center from the face center
+        offset_ratio = _gaze_offset_ratio(left_eye[0], right_eye[0], face_box[0], face_box[2])
+        
+        # Determine gaze direction: level 0 = |r| < 0.1, 1 = up to 0.2, 2 = beyond
+        magnitude = abs(offset_ratio)
+        level = (magnitude >= 0.1) + (magnitude > 0.2)
+        direction = _GAZE_LABELS[offset_ratio > 0][level]
         
         return {
             'direction': direction,
@@ -144,31 +197,33 @@ class AdvancedFaceTracker:
             'offset_ratio': round(offset_ratio, 2)
         }
     
-    def calculate_face_quality(self, frame, face_box):
-        """Calculate face image quality metrics"""
+    def calculate_face_quality(self, frame, face_box, gray_roi):
+        """Calculate face image quality metrics from the face's grayscale ROI"""
         x, y, w, h = face_box[:4]
-        face_roi = frame[y:y+h, x:x+w]
+        gray = gray_roi
         
-        if face_roi.size == 0:
+        if gray.size == 0:
             return {'quality': 'Poor', 'score': 0}
         
-        gray = cv2.cvtColor(face_roi, cv2.COLOR_BGR2GRAY) if len(face_roi.shape) == 3 else face_roi
-        
         # Calculate various quality metrics
-        # 1. Sharpness (Laplacian variance)
-        sharpness = cv2.Laplacian(gray, cv2.CV_64F).var()
-        
-        # 2. Brightness
-        brightness = np.mean(gray)
-        
-        # 3. Contrast
-        contrast = gray.std()
-        
-        # 4. Face size (larger is better for analysis)
+        # 1. Face size (larger is better for analysis)
         face_area = w * h
         frame_area = frame.shape[0] * frame.shape[1]
         size_ratio = face_area / frame_area if frame_area > 0 else 0
         
+        # 2. Sharpness (Laplacian variance) - CV_16S holds the full 3x3 response
+        # range for uint8 input, so it matches CV_64F at a quarter of the memory.
+        # Tiny faces (<1% of the frame) are skipped since they can't score well.
+        if size_ratio < 0.01:
+            sharpness = 0.0
+        else:
+            sharpness = float(cv2.Laplacian(gray, cv2.CV_16S).var())
+        
+        # 3/4. Brightness and contrast in a single pass
+        mean, stddev = cv2.meanStdDev(gray)
+        brightness = mean[0, 0]
+        contrast = stddev[0, 0]
+        
         # Normalize scores (0-1)
         sharpness_score = min(1.0, sharpness / 500)
         brightness_score = 1.0 - abs(brightness - 127) / 127  # Optimal around 127
@@ -244,7 +299,7 @@ class AdvancedFaceTracker:
         dx = right_eye[0] - left_eye[0]
         
         if dx != 0:
-            roll_angle = np.degrees(np.arctan2(dy, dx))
+            roll_angle = degrees(atan2(dy, dx))
         else:
             roll_angle = 0
         
@@ -263,43 +318,50 @@ class AdvancedFaceTracker:
     
     def track_expression_changes(self, face_id, expression, confidence):
         """Track expression changes over time"""
-        if face_id not in self.expression_history:
-            self.expression_history[face_id] = {
-                'current': expression,
-                'confidence': confidence,
-                'duration': 0,
-                'changes': 0,
-                'last_change_time': time.time()
-            }
+        now = time.time()
+        state = self.expression_history.get(face_id)
+        if state is None:
+            self.expression_history[face_id] = ExprState(expression, confidence, now)
             return
         
-        history = self.expression_history[face_id]
-        
-        if history['current'] != expression:
-            history['changes'] += 1
-            history['last_change_time'] = time.time()
-            history['current'] = expression
-            history['confidence'] = confidence
-            history['duration'] = 0
+        if state.current != expression:
+            state.changes += 1
+            state.last_change_time = now
+            state.current = expression
+            state.confidence = confidence
+            state.duration = 0
         else:
-            history['duration'] = time.time() - history['last_change_time']
-            history['confidence'] = max(history['confidence'], confidence)
+            state.duration = now - state.last_change_time
+            state.confidence = max(state.confidence, confidence)
     
     def get_expression_stats(self, face_id):
         """Get expression statistics for a face"""
-        if face_id not in self.expression_history:
+        state = self.expression_history.get(face_id)
+        if state is None:
             return None
         
-        return self.expression_history[face_id]
+        return state.to_dict()
     
     def reset_face_tracking(self, face_id):
         """Reset tracking for a specific face"""
         if face_id in self.blink_history:
-            del self.blink_history[face_id]
+            self._free_blink_slots.append(self.blink_history.pop(face_id))
         if face_id in self.gaze_history:
             del self.gaze_history[face_id]
         if face_id in self.expression_history:
             del self.expression_history[face_id]
         if face_id in self.quality_metrics:
             del self.quality_metrics[face_id]
+    
+    def reset(self):
+        """Reset tracking for all faces"""
+        self.blink_history.clear()
+        self._free_blink_slots = list(range(MAX_TRACKED_FACES))
+        self.closed_run[:] = 0
+        self.blink_count[:] = 0
+        self.frames_seen[:] = 0
+        self.last_blink_frame[:] = 0
+        self.gaze_history.clear()
+        self.expression_history.clear()
+        self.quality_metrics.clear()
 
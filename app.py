@@ -1,12 +1,25 @@
 from flask import Flask, render_template, Response, jsonify, request
 import threading
 import numpy as np
-from collections import deque
+from collections import deque, OrderedDict
 import time
-import base64
+import json
+import itertools
 import sys
 import os
 
+# Faster JSON encoder (numpy-aware) when installed; jsonify is the fallback
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# SIMD base64 codec when installed; same API as the stdlib module
+try:
+    import pybase64 as base64
+except ImportError:
+    import base64
+
 app = Flask(__name__, static_folder='static', static_url_path='/static')
 
 # Try to import OpenCV and face detection modules with error handling
@@ -20,6 +33,38 @@ except ImportError as e:
     print(f"Warning: OpenCV not available: {e}")
     CV2_AVAILABLE = False
 
+# Output JPEG settings: quality is tunable per deployment via JPEG_Q, chroma
+# is subsampled 4:2:0 to shrink the frames sent back to the browser
+JPEG_QUALITY = int(os.environ.get('JPEG_Q', 75))
+JPEG_PARAMS = []
+if CV2_AVAILABLE:
+    JPEG_PARAMS = [
+        cv2.IMWRITE_JPEG_QUALITY, JPEG_QUALITY,
+        cv2.IMWRITE_JPEG_CHROMA_QUALITY, 75,
+        cv2.IMWRITE_JPEG_SAMPLING_FACTOR, cv2.IMWRITE_JPEG_SAMPLING_FACTOR_420,
+        cv2.IMWRITE_JPEG_OPTIMIZE, 1
+    ]
+
+# Optional libjpeg-turbo codec (SIMD IDCT/color conversion); OpenCV is the fallback
+jpeg = None
+try:
+    from turbojpeg import TurboJPEG, TJPF_BGR, TJSAMP_420
+    jpeg = TurboJPEG()
+except Exception:
+    jpeg = None
+
+# Per-thread decode target reused across requests: a decoded frame only lives
+# for the request that decoded it (nothing keeps a reference to the pixels)
+decode_scratch = threading.local()
+
+# Optional WebSocket transport so clients can stream raw JPEG bytes
+sock = None
+try:
+    from flask_sock import Sock
+    sock = Sock(app)
+except ImportError:
+    sock = None
+
 # Initialize face detector and analyzer (with error handling)
 detector = None
 analyzer = None
@@ -43,6 +88,8 @@ if CV2_AVAILABLE:
         
         detector = FaceDetector()
         analyzer = FaceAnalyzer()
+        # Detect every Nth frame, following tracked faces in between (single-camera setups)
+        analyzer.detect_stride = max(1, int(os.environ.get('DETECT_STRIDE', 1)))
         feature_analyzer = FacialFeatureAnalyzer()
         advanced_tracker = AdvancedFaceTracker()
         micro_tracker = MicroExpressionTracker()
@@ -55,19 +102,46 @@ if CV2_AVAILABLE:
         print(f"Warning: Face detection modules not available: {e}")
         FACE_DETECTION_AVAILABLE = False
 
-# Store previous quadrants for movement tracking
-previous_quadrants = {}
+# Uploads wider than this are downscaled once before any processing
+PROCESSING_MAX_WIDTH = 960
 
-# Store analysis for each client session
-client_analyses = {}  # {session_id: analysis}
-client_sessions = {}  # {session_id: session_data}
+# Per-session and per-face stores keep only this many recently written entries
+MAX_TRACKED_ENTRIES = 1024
 
-# Analysis lock for thread safety
-analysis_lock = threading.Lock()
+class LRUDict(OrderedDict):
+    """Dict that evicts its least recently written entries beyond maxsize"""
+    def __init__(self, maxsize):
+        super().__init__()
+        self.maxsize = maxsize
+        self._lock = threading.Lock()
+    
+    def __setitem__(self, key, value):
+        with self._lock:
+            super().__setitem__(key, value)
+            self.move_to_end(key)
+            while len(self) > self.maxsize:
+                self.popitem(last=False)
+
+# Store previous quadrants for movement tracking (face IDs only grow, so the
+# faces that left longest ago are the ones evicted)
+previous_quadrants = LRUDict(MAX_TRACKED_ENTRIES)
+
+# Store analysis for each client session
+client_analyses = LRUDict(MAX_TRACKED_ENTRIES)  # {session_id: analysis}
+client_sessions = LRUDict(MAX_TRACKED_ENTRIES)  # {session_id: session_data}
 
-# Store current frame analysis for API access
+# Store current frame analysis for API access. These are only ever read or
+# replaced whole (single dict operations, atomic under the GIL), so request
+# threads share them without a lock. DualCameraTracker works the same way:
+# writers serialize on one lock and publish a fresh per-camera record, which
+# readers use without locking.
 current_analysis = {}
 
+# Every stored analysis gets a new revision; /api/facial_features reuses its
+# JSON body per session until the revision changes
+analysis_revisions = itertools.count(1)
+facial_features_cache = LRUDict(MAX_TRACKED_ENTRIES)  # {session_id: (revision, json_bytes)}
+
 # CORS support for client-side camera
 from flask_cors import CORS
 CORS(app, resources={r"/*": {"origins": [
@@ -78,17 +152,22 @@ CORS(app, resources={r"/*": {"origins": [
     "http://localhost:3000"
 ]}})
 
-def base64_to_image(base64_string):
-    """Convert base64 string to OpenCV image"""
+def decode_image(image_data):
+    """Convert encoded image bytes to OpenCV image"""
     if not CV2_AVAILABLE:
         return None
     try:
-        # Remove data URL prefix if present
-        if ',' in base64_string:
-            base64_string = base64_string.split(',')[1]
-        
-        # Decode base64
-        image_data = base64.b64decode(base64_string)
+        # Decode with libjpeg-turbo when available (non-JPEG payloads fall through),
+        # straight into this thread's frame buffer when the size is unchanged
+        if jpeg is not None:
+            try:
+                width, height, _, _ = jpeg.decode_header(image_data)
+                frame = getattr(decode_scratch, 'frame', None)
+                if frame is None or frame.shape != (height, width, 3):
+                    frame = decode_scratch.frame = np.empty((height, width, 3), dtype=np.uint8)
+                return jpeg.decode(image_data, pixel_format=TJPF_BGR, dst=frame)
+            except Exception:
+                pass
         
         # Convert to numpy array
         nparr = np.frombuffer(image_data, np.uint8)
@@ -100,108 +179,170 @@ def base64_to_image(base64_string):
         print(f"Error decoding image: {e}")
         return None
 
-def image_to_base64(image):
-    """Convert OpenCV image to base64 string"""
+def encode_image(image):
+    """Convert OpenCV image to a JPEG buffer (bytes or a uint8 array)"""
     if not CV2_AVAILABLE:
         return None
     try:
-        _, buffer = cv2.imencode('.jpg', image, [cv2.IMWRITE_JPEG_QUALITY, 85])
-        image_base64 = base64.b64encode(buffer).decode('utf-8')
-        return image_base64
+        if jpeg is not None:
+            return jpeg.encode(image, quality=JPEG_QUALITY, pixel_format=TJPF_BGR, jpeg_subsample=TJSAMP_420)
+        # Returned as-is: base64 reads the array's buffer directly, no tobytes() copy
+        _, buffer = cv2.imencode('.jpg', image, JPEG_PARAMS)
+        return buffer
     except Exception as e:
         print(f"Error encoding image: {e}")
         return None
 
-def draw_corner_brackets(frame, x, y, w, h, color, thickness=2, length=20):
+def base64_to_image(base64_string):
+    """Convert base64 string to OpenCV image"""
+    if not CV2_AVAILABLE:
+        return None
+    try:
+        # Remove data URL prefix if present (find avoids split's list and extra copies)
+        comma = base64_string.find(',')
+        if comma >= 0:
+            base64_string = base64_string[comma + 1:]
+        
+        # Decode base64
+        image_data = base64.b64decode(base64_string, validate=False)
+        return decode_image(image_data)
+    except Exception as e:
+        print(f"Error decoding image: {e}")
+        return None
+
+def image_to_base64(image):
+    """Convert OpenCV image to base64 string"""
+    buffer = encode_image(image)
+    if buffer is None:
+        return None
+    return base64.b64encode(buffer).decode('utf-8')
+
+# Corner bracket template: per segment, the corner it starts from (in box
+# widths/heights) and the direction of its arm (in bracket lengths)
+BRACKET_CORNERS = np.array([[0, 0], [0, 0], [1, 0], [1, 0], [0, 1], [0, 1], [1, 1], [1, 1]], dtype=np.int32)
+BRACKET_ARMS = np.array([[1, 0], [0, 1], [-1, 0], [0, 1], [1, 0], [0, -1], [-1, 0], [0, -1]], dtype=np.int32)
+
+def corner_bracket_segments(boxes, length=25):
+    """Corner bracket line segments, shape (8 * len(boxes), 2, 2), for (x, y, w, h) boxes"""
+    boxes = np.asarray(boxes, dtype=np.int32).reshape(-1, 1, 4)
+    starts = BRACKET_CORNERS * boxes[:, :, 2:] + boxes[:, :, :2]
+    segments = np.stack([starts, starts + BRACKET_ARMS * np.int32(length)], axis=2)
+    return segments.reshape(-1, 2, 2)
+
+def draw_corner_brackets(frame, x, y, w, h, color, thickness=2, length=25):
     """Draw corner brackets around detected face"""
-    # Top-left
-    cv2.line(frame, (x, y), (x + length, y), color, thickness)
-    cv2.line(frame, (x, y), (x, y + length), color, thickness)
-    # Top-right
-    cv2.line(frame, (x + w, y), (x + w - length, y), color, thickness)
-    cv2.line(frame, (x + w, y), (x + w, y + length), color, thickness)
-    # Bottom-left
-    cv2.line(frame, (x, y + h), (x + length, y + h), color, thickness)
-    cv2.line(frame, (x, y + h), (x, y + h - length), color, thickness)
-    # Bottom-right
-    cv2.line(frame, (x + w, y + h), (x + w - length, y + h), color, thickness)
-    cv2.line(frame, (x + w, y + h), (x + w, y + h - length), color, thickness)
+    # Build all 8 arms from the template and draw them in one polylines call
+    cv2.polylines(frame, corner_bracket_segments([(x, y, w, h)], length), False, color, thickness)
 
-def draw_enhanced_detections(frame, analysis):
-    """Draw detection boxes and tracking info on frame"""
-    if not CV2_AVAILABLE:
-        return frame
+def update_trackers(analysis):
+    """Run quadrant, eye and head-pose tracking for each face and store the results in its features"""
     if 'faces' not in analysis or not analysis['faces']:
-        return frame
+        return
+    
+    # One timestamp per frame, shared by every face analysed in it
+    frame_time = time.time()
     
     for face_id, face_data in analysis['faces'].items():
-        x, y, w, h = face_data.get('bbox', [0, 0, 0, 0])
+        x, y, w, h = face_data.get('box', (0, 0, 0, 0))
         if w == 0 or h == 0:
             continue
-        
-        # Color based on face ID for tracking
-        color = (0, 255, 0)  # Green for detected faces
-        
-        # Get features for this face
-        features = face_data.get('features', {})
+        box = (x, y, w, h)
+        # setdefault so every update below lands in face_data directly
+        features = face_data.setdefault('features', {})
         
         # Enhanced tracking: quadrants, individual eyes, full head pose
         landmarks = features.get('landmarks', {})
-        frame_time = time.time()
         
         # Track face quadrants
-        quadrants = quadrant_tracker.divide_face_quadrants((x, y, w, h), landmarks)
+        quadrants = quadrant_tracker.divide_face_quadrants(box, landmarks)
         prev_quadrants = previous_quadrants.get(face_id)
         quadrant_movement = quadrant_tracker.analyze_quadrant_movement(quadrants, prev_quadrants) if quadrants else {}
         if quadrants:
             previous_quadrants[face_id] = quadrants
         
         # Track individual eyes
-        individual_eyes = eye_tracker.track_individual_eyes(landmarks, (x, y, w, h), face_id, frame_time)
+        individual_eyes = eye_tracker.track_individual_eyes(landmarks, box, face_id, frame_time)
         
         # Calculate full 3D head pose
-        full_head_pose = head_pose_tracker.calculate_full_head_pose(landmarks, (x, y, w, h))
+        full_head_pose = head_pose_tracker.calculate_full_head_pose(landmarks, box)
         
-        # Add to features
-        if 'advanced' not in features:
-            features['advanced'] = {}
-        
-        features['advanced']['quadrants'] = {
+        # Add to features (stored on face_data for API access)
+        advanced = features.setdefault('advanced', {})
+        advanced['quadrants'] = {
             'quadrants': quadrants,
             'movement': quadrant_movement
         } if quadrants else {}
-        features['advanced']['individual_eyes'] = individual_eyes
-        features['advanced']['full_head_pose'] = full_head_pose
-        
-        # Draw corner brackets instead of full rectangle
-        draw_corner_brackets(frame, x, y, w, h, color, thickness=3, length=25)
-        
-        # Draw small ID label in top-left corner (minimal)
-        cv2.putText(frame, f"ID:{face_id}", (x + 5, y - 5),
-                   cv2.FONT_HERSHEY_SIMPLEX, 0.5, color, 2)
-        
-        # Store features in face_data for API access
-        face_data['features'] = features
+        advanced['individual_eyes'] = individual_eyes
+        advanced['full_head_pose'] = full_head_pose
+
+def draw_enhanced_detections(frame, analysis):
+    """Draw detection boxes on frame (pixels only; clients draw the ID labels)"""
+    if not CV2_AVAILABLE:
+        return frame
+    if 'faces' not in analysis or not analysis['faces']:
+        return frame
+    
+    bracket_boxes = []
+    for face_data in analysis['faces'].values():
+        x, y, w, h = face_data.get('box', (0, 0, 0, 0))
+        if w == 0 or h == 0:
+            continue
+        bracket_boxes.append((x, y, w, h))
+    
+    # Corner brackets instead of full rectangles, every face in one polylines call
+    if bracket_boxes:
+        cv2.polylines(frame, corner_bracket_segments(bracket_boxes), False, (0, 255, 0), 3)
     
     return frame
 
+def _serialize_dict(value):
+    return {k: serialize_value(v) for k, v in value.items()}
+
+def _serialize_sequence(value):
+    return [serialize_value(item) for item in value]
+
+def _resolve_serializer(cls):
+    """Pick the converter for a type not yet in SERIALIZERS (None = pass through)"""
+    if issubclass(cls, np.integer):
+        return int
+    elif issubclass(cls, np.floating):
+        return float
+    elif issubclass(cls, np.bool_):
+        return bool
+    elif issubclass(cls, np.ndarray):
+        return np.ndarray.tolist
+    elif issubclass(cls, deque):
+        return list
+    elif issubclass(cls, dict):
+        return _serialize_dict
+    elif issubclass(cls, (list, tuple)):
+        return _serialize_sequence
+    return None
+
+# Converters keyed by exact type; other types are resolved once and cached here
+SERIALIZERS = {
+    str: None, int: None, float: None, bool: None, type(None): None,
+    np.int32: int, np.int64: int, np.float32: float, np.float64: float, np.bool_: bool,
+    np.ndarray: np.ndarray.tolist, deque: list,
+    dict: _serialize_dict, list: _serialize_sequence, tuple: _serialize_sequence
+}
+_UNRESOLVED = object()
+
 def serialize_value(value):
     """Recursively serialize numpy types and deques to JSON-compatible types"""
-    if isinstance(value, (np.integer, np.int64)):
-        return int(value)
-    elif isinstance(value, (np.floating, np.float64)):
-        return float(value)
-    elif isinstance(value, np.bool_):
-        return bool(value)
-    elif isinstance(value, np.ndarray):
-        return value.tolist()
-    elif isinstance(value, deque):
-        return list(value)
-    elif isinstance(value, dict):
-        return {k: serialize_value(v) for k, v in value.items()}
-    elif isinstance(value, (list, tuple)):
-        return [serialize_value(item) for item in value]
-    return value
+    cls = type(value)
+    converter = SERIALIZERS.get(cls, _UNRESOLVED)
+    if converter is _UNRESOLVED:
+        converter = SERIALIZERS[cls] = _resolve_serializer(cls)
+    return value if converter is None else converter(value)
+
+def json_response(payload):
+    """JSON response for payloads that may still contain numpy values or deques"""
+    if orjson is None:
+        return jsonify(serialize_value(payload))
+    body = orjson.dumps(payload, default=serialize_value,
+                        option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+    return Response(body, mimetype='application/json')
 
 @app.route('/')
 def index():
@@ -249,6 +390,53 @@ def api_serve_static():
         print(f"Error serving static file {path}: {e}")
         return f"File not found: {path}", 404
 
+def resize_for_processing(frame):
+    """Downscale frames wider than PROCESSING_MAX_WIDTH, returning (frame, scale)"""
+    h, w = frame.shape[:2]
+    if w <= PROCESSING_MAX_WIDTH:
+        return frame, 1.0
+    scale = PROCESSING_MAX_WIDTH / w
+    resized = cv2.resize(frame, (PROCESSING_MAX_WIDTH, int(round(h * scale))),
+                         interpolation=cv2.INTER_AREA)
+    return resized, scale
+
+def analyze_client_frame(frame, session_id, draw=False):
+    """Analyze a decoded client frame and store the results for its session"""
+    # Everything downstream (detection, tracking, drawing, encoding) scales with
+    # pixel count, so cap the resolution once here
+    frame, scale = resize_for_processing(frame)
+    
+    # Analyze faces (detection + tracking + metrics)
+    analysis = analyzer.analyze_faces(frame)
+    
+    # Boxes are in processing coordinates; divide by this to map to the upload
+    analysis['processing_scale'] = scale
+    analysis['revision'] = next(analysis_revisions)
+    
+    # Quadrant/eye/head-pose tracking runs whether or not a frame is rendered
+    update_trackers(analysis)
+    
+    # Draw enhanced detections - in place, since the analyzer keeps no
+    # reference to the decoded pixels
+    processed_frame = draw_enhanced_detections(frame, analysis) if draw else None
+    
+    # Store analysis for API access
+    global current_analysis
+    current_analysis = analysis
+    
+    # Store for client session
+    client_analyses[session_id] = analysis
+    
+    # Update dual camera tracker (if multiple sessions)
+    if 'faces' in analysis:
+        faces_data = {}
+        for face_id, face_data in analysis['faces'].items():
+            if 'features' in face_data:
+                faces_data[face_id] = face_data
+        dual_camera_tracker.update_camera_data(session_id, faces_data)
+    
+    return analysis, processed_frame
+
 @app.route('/api/process_frame', methods=['POST'])
 def process_frame():
     """Process a frame sent from the client browser"""
@@ -266,42 +454,27 @@ def process_frame():
         
         session_id = data.get('session_id', 'default')
         frame_base64 = data['frame']
+        # The client draws overlays from the returned boxes; the annotated frame
+        # is only rendered and sent back when asked for (?render=1 or "draw": true)
+        draw = request.args.get('render') == '1' or bool(data.get('draw', False))
         
         # Convert base64 to OpenCV image
         frame = base64_to_image(frame_base64)
         if frame is None:
             return jsonify({'status': 'error', 'message': 'Invalid image data'}), 400
         
-        # Analyze faces (detection + tracking + metrics)
-        analysis = analyzer.analyze_faces(frame)
+        analysis, processed_frame = analyze_client_frame(frame, session_id, draw)
         
-        # Draw enhanced detections with tracking info
-        processed_frame = draw_enhanced_detections(frame.copy(), analysis)
-        
-        # Store analysis for API access
-        with analysis_lock:
-            global current_analysis
-            current_analysis = analysis
-            
-            # Store for client session
-            client_analyses[session_id] = analysis
-            
-            # Update dual camera tracker (if multiple sessions)
-            if 'faces' in analysis:
-                faces_data = {}
-                for face_id, face_data in analysis['faces'].items():
-                    if 'features' in face_data:
-                        faces_data[face_id] = face_data
-                dual_camera_tracker.update_camera_data(session_id, faces_data)
-        
-        # Convert processed frame back to base64
-        processed_frame_base64 = image_to_base64(processed_frame)
-        
-        return jsonify({
+        response = {
             'status': 'success',
-            'processed_frame': processed_frame_base64,
             'analysis': serialize_value(analysis)
-        })
+        }
+        
+        # Convert processed frame back to base64 (skipped entirely when not drawing)
+        if draw:
+            response['processed_frame'] = image_to_base64(processed_frame)
+        
+        return jsonify(response)
         
     except Exception as e:
         print(f"Error processing frame: {e}")
@@ -315,8 +488,7 @@ def get_facial_features():
     try:
         session_id = request.args.get('session_id', 'default')
         
-        with analysis_lock:
-            analysis = client_analyses.get(session_id, current_analysis)
+        analysis = client_analyses.get(session_id, current_analysis)
         
         if not analysis or 'faces' not in analysis:
             return jsonify({
@@ -324,6 +496,12 @@ def get_facial_features():
                 'faces': []
             })
         
+        # Polling faster than frames arrive - serve the body built last time
+        revision = analysis.get('revision')
+        cached = facial_features_cache.get(session_id)
+        if cached is not None and revision is not None and cached[0] == revision:
+            return Response(cached[1], mimetype='application/json')
+        
         faces_data = []
         for face_id, face_data in analysis['faces'].items():
             features = face_data.get('features', {})
@@ -336,37 +514,38 @@ def get_facial_features():
             
             faces_data.append({
                 'id': face_id,
-                'bbox': face_data.get('bbox', [0, 0, 0, 0]),
+                'bbox': list(face_data.get('box', (0, 0, 0, 0))),
                 'confidence': float(features.get('confidence', 0)),
-                'landmarks': serialize_value(features.get('landmarks', {})),
+                'landmarks': features.get('landmarks', {}),
                 'expression': features.get('expression', 'neutral'),
                 'emotion': features.get('emotion', 'neutral'),
                 'age': int(features.get('age', 0)),
                 'gender': features.get('gender', 'unknown'),
                 'eye_status': features.get('eye_status', {}),
                 'mouth_status': features.get('mouth_status', {}),
-                'head_pose': serialize_value(features.get('head_pose', {})),
-                'gaze': serialize_value(advanced.get('gaze', {})),
-                'quality': serialize_value(advanced.get('quality', {})),
+                'head_pose': features.get('head_pose', {}),
+                'gaze': advanced.get('gaze', {}),
+                'quality': advanced.get('quality', {}),
                 'symmetry': float(features.get('symmetry', 0)),
                 'position': {
                     'center': [int(x) for x in face_data.get('center', [0, 0])],
                     'area': int(face_data.get('area', 0))
                 },
-                'age_gender': serialize_value(advanced.get('age_gender', {})),
-                'blink': serialize_value(blink_info),
-                'action_units': serialize_value(advanced.get('action_units', {})),
-                'face_roll': serialize_value(advanced.get('face_roll', {})),
-                'expression_stats': serialize_value(advanced.get('expression_stats', {})),
-                'eye_movements': serialize_value(advanced.get('eye_movements', {})),
-                'mouth_movements': serialize_value(advanced.get('mouth_movements', {})),
-                'micro_expressions': serialize_value(advanced.get('micro_expressions', {})),
-                'quadrants': serialize_value(advanced.get('quadrants', {})),
-                'individual_eyes': serialize_value(advanced.get('individual_eyes', {})),
-                'full_head_pose': serialize_value(advanced.get('full_head_pose', {}))
+                'age_gender': advanced.get('age_gender', {}),
+                'blink': blink_info,
+                'action_units': advanced.get('action_units', {}),
+                'face_roll': advanced.get('face_roll', {}),
+                'expression_stats': advanced.get('expression_stats', {}),
+                'eye_movements': advanced.get('eye_movements', {}),
+                'mouth_movements': advanced.get('mouth_movements', {}),
+                'micro_expressions': advanced.get('micro_expressions', {}),
+                'quadrants': advanced.get('quadrants', {}),
+                'individual_eyes': advanced.get('individual_eyes', {}),
+                'full_head_pose': advanced.get('full_head_pose', {})
             })
         
-        return jsonify({
+        # numpy values and deques are left for json_response to convert
+        response = json_response({
             'status': 'success',
             'faces': faces_data,
             'count': analysis.get('count', 0),
@@ -376,6 +555,8 @@ def get_facial_features():
             'session_duration': analysis.get('session_duration', 0),
             'avg_faces_per_sec': float(analysis.get('avg_faces_per_sec', 0))
         })
+        facial_features_cache[session_id] = (revision, response.get_data())
+        return response
     except Exception as e:
         return jsonify({'status': 'error', 'message': str(e)}), 500
 
@@ -385,16 +566,19 @@ def reset_stats():
     try:
         session_id = request.get_json().get('session_id', 'default') if request.is_json else 'default'
         
-        analyzer.reset_session()
+        # Clear the per-face stores before face IDs restart, so new faces
+        # don't inherit a previous face's history
         advanced_tracker.reset()
         micro_tracker.reset()
-        quadrant_tracker.reset()
         eye_tracker.reset()
+        previous_quadrants.clear()
+        feature_analyzer.reset_stable_features()
+        analyzer.reset_session()
         
-        with analysis_lock:
-            if session_id in client_analyses:
-                del client_analyses[session_id]
-            current_analysis = {}
+        global current_analysis
+        client_analyses.pop(session_id, None)
+        facial_features_cache.pop(session_id, None)
+        current_analysis = {}
         
         return jsonify({'status': 'success', 'message': 'Statistics reset'})
     except Exception as e:
@@ -415,6 +599,38 @@ def get_cross_reference():
     except Exception as e:
         return jsonify({'status': 'error', 'message': str(e)}), 500
 
+if sock is not None:
+    @sock.route('/ws/frames')
+    def frame_socket(ws):
+        """Stream frames over a WebSocket as binary JPEG messages"""
+        session_id = request.args.get('session_id', 'default')
+        draw = request.args.get('render') == '1'
+        
+        while True:
+            data = ws.receive()
+            if not FACE_DETECTION_AVAILABLE:
+                ws.send(json.dumps({'status': 'error', 'message': 'Face detection is not available'}))
+                continue
+            if not isinstance(data, (bytes, bytearray)):
+                ws.send(json.dumps({'status': 'error', 'message': 'Expected a binary JPEG frame'}))
+                continue
+            
+            try:
+                frame = decode_image(data)
+                if frame is None:
+                    ws.send(json.dumps({'status': 'error', 'message': 'Invalid image data'}))
+                    continue
+                
+                analysis, processed_frame = analyze_client_frame(frame, session_id, draw)
+                
+                # JSON results as a text message, then the rendered frame as raw bytes
+                ws.send(json.dumps({'status': 'success', 'analysis': serialize_value(analysis)}))
+                if draw:
+                    ws.send(bytes(encode_image(processed_frame)))
+            except Exception as e:
+                print(f"Error processing frame: {e}")
+                ws.send(json.dumps({'status': 'error', 'message': str(e)}))
+
 if __name__ == '__main__':
     import os
     # Get port from environment variable (for cloud deployment) or use default
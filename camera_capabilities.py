@@ -1,146 +1,160 @@
 import cv2
-import platform
+from types import MappingProxyType
+
+def _profile_settings(profile):
+    """Camera settings derived from a capability profile"""
+    resolution = profile.get('optimal_resolution', (1280, 720))
+    return {
+        'width': resolution[0],
+        'height': resolution[1],
+        'fps': profile.get('fps', 30),
+        'quality': profile.get('quality', 'Good'),
+        'features': profile.get('features', ['Standard detection']),
+        'use_case': profile.get('use_case', 'General detection')
+    }
 
 class CameraCapabilities:
     """Manage camera capabilities and optimize settings per camera type"""
     
-    def __init__(self):
-        self.camera_profiles = {
-            # Generic laptop/built-in cameras (most common)
-            'Laptop Built-in Camera': {
-                'optimal_resolution': (1280, 720),
-                'fps': 30,
-                'quality': 'Good',
-                'features': ['Standard detection', 'Good for wide angle'],
-                'use_case': 'Primary camera for most users'
-            },
-            'Built-in Camera': {
-                'optimal_resolution': (1280, 720),
-                'fps': 30,
-                'quality': 'Good',
-                'features': ['Standard detection'],
-                'use_case': 'Primary camera'
-            },
-            'Default Camera': {
-                'optimal_resolution': (1280, 720),
-                'fps': 30,
-                'quality': 'Good',
-                'features': ['Standard detection'],
-                'use_case': 'Primary camera'
-            },
-            # MacBook specific (fallback to generic if not found)
-            'MacBook Air Built-in Camera': {
-                'optimal_resolution': (1280, 720),
-                'fps': 30,
-                'quality': 'Good',
-                'features': ['Standard detection', 'Good for wide angle'],
-                'use_case': 'Primary or wide-angle view'
-            },
-            'MacBook Air Built-in Camera (720p)': {
-                'optimal_resolution': (1280, 720),
-                'fps': 30,
-                'quality': 'Good',
-                'features': ['Standard detection'],
-                'use_case': 'Primary camera'
-            },
-            'MacBook Air Built-in Camera (1080p)': {
-                'optimal_resolution': (1920, 1080),
-                'fps': 30,
-                'quality': 'Good',
-                'features': ['HD resolution'],
-                'use_case': 'Primary camera'
-            },
-            # iPhone cameras (enhanced, but optional)
-            'iPhone 16 Pro Max': {
-                'optimal_resolution': (1920, 1080),
-                'fps': 60,
-                'quality': 'Excellent',
-                'features': ['High resolution', 'Better low light', 'Portrait mode capable'],
-                'use_case': 'High-quality detection and analysis'
-            },
-            'iPhone 13 Pro Max': {
-                'optimal_resolution': (1920, 1080),
-                'fps': 60,
-                'quality': 'Excellent',
-                'features': ['High resolution', 'Good low light'],
-                'use_case': 'High-quality detection and analysis'
-            },
-            'iPhone Camera': {
-                'optimal_resolution': (1920, 1080),
-                'fps': 60,
-                'quality': 'Excellent',
-                'features': ['High resolution'],
-                'use_case': 'High-quality detection'
-            },
-            'iPhone Camera (1080p) - Check Model': {
-                'optimal_resolution': (1920, 1080),
-                'fps': 60,
-                'quality': 'Excellent',
-                'features': ['High resolution'],
-                'use_case': 'High-quality detection'
-            },
-            # External cameras (generic)
-            'External Camera (possibly iPhone)': {
-                'optimal_resolution': (1920, 1080),
-                'fps': 30,
-                'quality': 'Good',
-                'features': ['External camera'],
-                'use_case': 'Secondary or primary camera'
-            },
-            'External Camera 0': {
-                'optimal_resolution': (1280, 720),
-                'fps': 30,
-                'quality': 'Good',
-                'features': ['External camera'],
-                'use_case': 'Secondary camera'
-            },
-            'Camera 0 - Check Resolution': {
-                'optimal_resolution': (1280, 720),
-                'fps': 30,
-                'quality': 'Good',
-                'features': ['Standard detection'],
-                'use_case': 'Primary camera'
-            }
+    # Built once for the class; read-only since every instance shares it
+    camera_profiles = MappingProxyType({
+        # Generic laptop/built-in cameras (most common)
+        'Laptop Built-in Camera': {
+            'optimal_resolution': (1280, 720),
+            'fps': 30,
+            'quality': 'Good',
+            'features': ['Standard detection', 'Good for wide angle'],
+            'use_case': 'Primary camera for most users'
+        },
+        'Built-in Camera': {
+            'optimal_resolution': (1280, 720),
+            'fps': 30,
+            'quality': 'Good',
+            'features': ['Standard detection'],
+            'use_case': 'Primary camera'
+        },
+        'Default Camera': {
+            'optimal_resolution': (1280, 720),
+            'fps': 30,
+            'quality': 'Good',
+            'features': ['Standard detection'],
+            'use_case': 'Primary camera'
+        },
+        # MacBook specific (fallback to generic if not found)
+        'MacBook Air Built-in Camera': {
+            'optimal_resolution': (1280, 720),
+            'fps': 30,
+            'quality': 'Good',
+            'features': ['Standard detection', 'Good for wide angle'],
+            'use_case': 'Primary or wide-angle view'
+        },
+        'MacBook Air Built-in Camera (720p)': {
+            'optimal_resolution': (1280, 720),
+            'fps': 30,
+            'quality': 'Good',
+            'features': ['Standard detection'],
+            'use_case': 'Primary camera'
+        },
+        'MacBook Air Built-in Camera (1080p)': {
+            'optimal_resolution': (1920, 1080),
+            'fps': 30,
+            'quality': 'Good',
+            'features': ['HD resolution'],
+            'use_case': 'Primary camera'
+        },
+        # iPhone cameras (enhanced, but optional)
+        'iPhone 16 Pro Max': {
+            'optimal_resolution': (1920, 1080),
+            'fps': 60,
+            'quality': 'Excellent',
+            'features': ['High resolution', 'Better low light', 'Portrait mode capable'],
+            'use_case': 'High-quality detection and analysis'
+        },
+        'iPhone 13 Pro Max': {
+            'optimal_resolution': (1920, 1080),
+            'fps': 60,
+            'quality': 'Excellent',
+            'features': ['High resolution', 'Good low light'],
+            'use_case': 'High-quality detection and analysis'
+        },
+        'iPhone Camera': {
+            'optimal_resolution': (1920, 1080),
+            'fps': 60,
+            'quality': 'Excellent',
+            'features': ['High resolution'],
+            'use_case': 'High-quality detection'
+        },
+        'iPhone Camera (1080p) - Check Model': {
+            'optimal_resolution': (1920, 1080),
+            'fps': 60,
+            'quality': 'Excellent',
+            'features': ['High resolution'],
+            'use_case': 'High-quality detection'
+        },
+        # External cameras (generic)
+        'External Camera (possibly iPhone)': {
+            'optimal_resolution': (1920, 1080),
+            'fps': 30,
+            'quality': 'Good',
+            'features': ['External camera'],
+            'use_case': 'Secondary or primary camera'
+        },
+        'External Camera 0': {
+            'optimal_resolution': (1280, 720),
+            'fps': 30,
+            'quality': 'Good',
+            'features': ['External camera'],
+            'use_case': 'Secondary camera'
+        },
+        'Camera 0 - Check Resolution': {
+            'optimal_resolution': (1280, 720),
+            'fps': 30,
+            'quality': 'Good',
+            'features': ['Standard detection'],
+            'use_case': 'Primary camera'
         }
+    })
     
-    def get_optimal_settings(self, camera_name):
-        """Get optimal camera settings based on camera type"""
-        # Try exact match first
-        profile = self.camera_profiles.get(camera_name, {})
-        
-        # If no exact match, try to find a generic match
-        if not profile:
-            # Check for built-in/laptop patterns
-            if any(keyword in camera_name.lower() for keyword in ['built-in', 'laptop', 'default', 'facetime', 'isight']):
-                profile = self.camera_profiles.get('Laptop Built-in Camera', {})
-            # Check for iPhone patterns
-            elif 'iphone' in camera_name.lower():
-                profile = self.camera_profiles.get('iPhone Camera', {})
-            # Check for external patterns
-            elif 'external' in camera_name.lower():
-                profile = self.camera_profiles.get('External Camera (possibly iPhone)', {})
-            # Default fallback
-            else:
-                profile = self.camera_profiles.get('Default Camera', {})
+    # Name substrings mapped to a generic profile, checked in order when a
+    # camera has no exact profile
+    PROFILE_KEYWORDS = (
+        ('built-in', 'Laptop Built-in Camera'),
+        ('laptop', 'Laptop Built-in Camera'),
+        ('default', 'Laptop Built-in Camera'),
+        ('facetime', 'Laptop Built-in Camera'),
+        ('isight', 'Laptop Built-in Camera'),
+        ('iphone', 'iPhone Camera'),
+        ('external', 'External Camera (possibly iPhone)')
+    )
+    
+    # Settings for each profile are built once and shared - callers must
+    # treat the dicts returned by get_optimal_settings as read-only
+    PROFILE_SETTINGS = MappingProxyType({name: _profile_settings(profile)
+                                         for name, profile in camera_profiles.items()})
+    DEFAULT_SETTINGS = _profile_settings({
+        'optimal_resolution': (1280, 720),  # Safe default for most cameras
+        'fps': 30,
+        'quality': 'Good',
+        'features': ['Standard detection'],
+        'use_case': 'General detection'
+    })
+    
+    def resolve_profile_name(self, camera_name):
+        """Profile name for a camera: exact name match first, then keyword fallback"""
+        if self.camera_profiles.get(camera_name):
+            return camera_name
         
+        name_lc = camera_name.lower()
+        return next((name for keyword, name in self.PROFILE_KEYWORDS if keyword in name_lc), 'Default Camera')
+    
+    def resolve_profile(self, camera_name):
+        """Profile for a camera: exact name match first, then keyword fallback"""
+        return self.camera_profiles.get(self.resolve_profile_name(camera_name), {})
+    
+    def get_optimal_settings(self, camera_name):
+        """Get optimal camera settings based on camera type (shared dict, read-only)"""
         # Fallback to safe defaults if still no profile
-        if not profile:
-            profile = {
-                'optimal_resolution': (1280, 720),  # Safe default for most cameras
-                'fps': 30,
-                'quality': 'Good',
-                'features': ['Standard detection'],
-                'use_case': 'General detection'
-            }
-        
-        return {
-            'width': profile.get('optimal_resolution', (1280, 720))[0],
-            'height': profile.get('optimal_resolution', (1280, 720))[1],
-            'fps': profile.get('fps', 30),
-            'quality': profile.get('quality', 'Good'),
-            'features': profile.get('features', ['Standard detection']),
-            'use_case': profile.get('use_case', 'General detection')
-        }
+        return self.PROFILE_SETTINGS.get(self.resolve_profile_name(camera_name), self.DEFAULT_SETTINGS)
     
     def configure_camera(self, camera, camera_name):
         """Configure camera with optimal settings"""
@@ -233,19 +247,7 @@ class CameraCapabilities:
     
     def get_camera_quality_score(self, camera_name, resolution):
         """Calculate quality score for camera selection"""
-        # Try exact match first
-        profile = self.camera_profiles.get(camera_name, {})
-        
-        # If no exact match, try generic match
-        if not profile:
-            if any(keyword in camera_name.lower() for keyword in ['built-in', 'laptop', 'default', 'facetime', 'isight']):
-                profile = self.camera_profiles.get('Laptop Built-in Camera', {})
-            elif 'iphone' in camera_name.lower():
-                profile = self.camera_profiles.get('iPhone Camera', {})
-            elif 'external' in camera_name.lower():
-                profile = self.camera_profiles.get('External Camera (possibly iPhone)', {})
-            else:
-                profile = self.camera_profiles.get('Default Camera', {})
+        profile = self.resolve_profile(camera_name)
         
         base_score = 50  # Default for unknown cameras
         
@@ -2,35 +2,69 @@ import cv2
 import platform
 import subprocess
 import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 
-def get_camera_name_macos(index):
-    """Try to get camera name on macOS using system_profiler or IORegistry"""
-    try:
-        # Method 1: Try system_profiler
-        result = subprocess.run(
-            ['system_profiler', 'SPCameraDataType'],
-            capture_output=True,
-            text=True,
-            timeout=2
-        )
+_NAME_RE = re.compile(r'(?:Model ID|Name):\s*(.+?)\s*$')
+
+# Every keyword identify_camera_type looks for in a camera name
+_CAMERA_KEYWORD_RE = re.compile(
+    r'facetime|built-in|isight|integrated|webcam|macbook|iphone|continuity'
+    r'|pro max|promax|obs|virtual|16|13'
+)
+_BUILTIN_KEYWORDS = frozenset(['facetime', 'built-in', 'isight', 'integrated', 'webcam'])
+
+# system_profiler takes ~300 ms per call, so one enumeration is shared by
+# every index probed within a short window (short enough for hot-plug)
+CAMERA_NAMES_TTL = 5.0
+_camera_names_lock = threading.Lock()
+_camera_names_cache = None
+_camera_names_time = 0.0
+
+def _get_macos_camera_names():
+    """Return camera names from system_profiler, cached for CAMERA_NAMES_TTL seconds"""
+    global _camera_names_cache, _camera_names_time
+    
+    with _camera_names_lock:
+        now = time.monotonic()
+        if _camera_names_cache is not None and now - _camera_names_time < CAMERA_NAMES_TTL:
+            return _camera_names_cache
         
-        if result.returncode == 0:
-            # Parse camera names from system_profiler output
-            lines = result.stdout.split('\n')
-            cameras = []
+        cameras = []
+        try:
+            result = subprocess.run(
+                ['system_profiler', 'SPCameraDataType'],
+                capture_output=True,
+                text=True,
+                timeout=2
+            )
             
-            for i, line in enumerate(lines):
-                # Look for camera model names
-                if 'Model ID:' in line or 'Name:' in line:
-                    match = re.search(r':\s*(.+)', line)
+            if result.returncode == 0:
+                # Parse camera names from system_profiler output
+                for line in result.stdout.split('\n'):
+                    # Look for camera model names
+                    match = _NAME_RE.match(line.lstrip())
                     if match:
-                        name = match.group(1).strip()
+                        name = match.group(1)
                         if name and name not in cameras:
                             cameras.append(name)
-            
-            # Try to match by index
-            if index < len(cameras):
-                return cameras[index]
+        except Exception:
+            pass
+        
+        _camera_names_cache = tuple(cameras)
+        _camera_names_time = now
+        return _camera_names_cache
+
+def get_camera_name_macos(index):
+    """Try to get camera name on macOS using system_profiler or IORegistry"""
+    try:
+        # Method 1: Try system_profiler (cached across calls)
+        cameras = _get_macos_camera_names()
+        
+        # Try to match by index
+        if index < len(cameras):
+            return cameras[index]
         
         # Method 2: Try IORegistry to get device names
         try:
@@ -61,29 +95,31 @@ def identify_camera_type(index, resolution, backend):
         name = get_camera_name_macos(index)
         if name:
             # Clean up the name - prioritize generic patterns first
-            name_lower = name.lower()
+            # (one regex pass collects every keyword present in the name)
+            tokens = set(_CAMERA_KEYWORD_RE.findall(name.lower()))
             
             # Generic built-in/laptop cameras (most common - works for any laptop)
-            if any(keyword in name_lower for keyword in ['facetime', 'built-in', 'isight', 'integrated', 'webcam']):
+            if not tokens.isdisjoint(_BUILTIN_KEYWORDS):
                 # Check if it's MacBook-specific (optional enhancement)
-                if 'macbook' in name_lower:
+                if 'macbook' in tokens:
                     return 'MacBook Air Built-in Camera'
                 # Generic laptop camera (works for Windows, Linux, etc.)
                 return 'Laptop Built-in Camera'
             # iPhone cameras (optional enhancement)
-            elif 'iphone' in name_lower or 'continuity' in name_lower:
+            elif 'iphone' in tokens or 'continuity' in tokens:
                 # Try to identify specific iPhone model (optional)
-                if '16' in name and ('pro max' in name_lower or 'promax' in name_lower):
+                pro_max = 'pro max' in tokens or 'promax' in tokens
+                if '16' in tokens and pro_max:
                     return 'iPhone 16 Pro Max'
-                elif '13' in name and ('pro max' in name_lower or 'promax' in name_lower):
+                elif '13' in tokens and pro_max:
                     return 'iPhone 13 Pro Max'
-                elif '16' in name:
+                elif '16' in tokens:
                     return 'iPhone 16 Pro Max'
-                elif '13' in name:
+                elif '13' in tokens:
                     return 'iPhone 13 Pro Max'
                 return 'iPhone Camera'
             # Virtual cameras
-            elif 'obs' in name_lower or 'virtual' in name_lower:
+            elif 'obs' in tokens or 'virtual' in tokens:
                 return 'OBS Virtual Camera'
             # Return as-is for other cameras (USB webcams, etc.)
             return name
@@ -128,30 +164,51 @@ def identify_camera_type(index, resolution, backend):
     else:
         return f'Camera {index}'
 
+def get_capture_backend():
+    """Return the native capture backend for this platform"""
+    system = platform.system()
+    if system == 'Darwin':
+        return cv2.CAP_AVFOUNDATION
+    elif system == 'Linux':
+        return cv2.CAP_V4L2
+    elif system == 'Windows':
+        return cv2.CAP_DSHOW
+    return cv2.CAP_ANY
+
+def _probe_camera(index, backend_flag=cv2.CAP_ANY):
+    """Open one camera index and describe it, or return None if unavailable"""
+    cap = cv2.VideoCapture(index, backend_flag)
+    try:
+        if not cap.isOpened():
+            return None
+        
+        # Try to get camera properties
+        backend = cap.getBackendName()
+        width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+        height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+    finally:
+        cap.release()
+    
+    # Try to identify camera type
+    camera_name = identify_camera_type(index, (width, height), backend)
+    
+    return {
+        'index': index,
+        'backend': backend,
+        'resolution': (width, height),
+        'name': camera_name,
+        'display_name': f"{camera_name} ({width}x{height})"
+    }
+
 def list_available_cameras():
     """List all available camera devices with better identification"""
-    available_cameras = []
+    # Pin the native backend so OpenCV doesn't retry every registered one
+    backend_flag = get_capture_backend()
     
-    # Try cameras 0-10
-    for i in range(10):
-        cap = cv2.VideoCapture(i)
-        if cap.isOpened():
-            # Try to get camera properties
-            backend = cap.getBackendName()
-            width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-            height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
-            
-            # Try to identify camera type
-            camera_name = identify_camera_type(i, (width, height), backend)
-            
-            available_cameras.append({
-                'index': i,
-                'backend': backend,
-                'resolution': (width, height),
-                'name': camera_name,
-                'display_name': f"{camera_name} ({width}x{height})"
-            })
-            cap.release()
+    # Try cameras 0-10 concurrently; a missing index can block for ~500 ms
+    with ThreadPoolExecutor(max_workers=10) as pool:
+        results = pool.map(_probe_camera, range(10), [backend_flag] * 10)
+        available_cameras = [cam for cam in results if cam is not None]
     
     return available_cameras
 
@@ -4,31 +4,35 @@ import threading
 import time
 from collections import defaultdict
 
+# Head pose angles cross-checked between cameras, and the allowed difference in degrees
+POSE_AXES = ('yaw', 'pitch', 'roll')
+POSE_TOLERANCE = 5
+
 class DualCameraTracker:
     def __init__(self):
         self.camera_data = {}  # Store data from each camera
         self.cross_reference_results = {}  # Cross-referenced validation results
-        self.camera_locks = {}  # Locks for each camera
+        self._write_lock = threading.Lock()  # Serializes writers; readers never lock
         
     def register_camera(self, camera_id):
         """Register a camera for dual tracking"""
-        if camera_id not in self.camera_data:
-            self.camera_data[camera_id] = {
-                'faces': {},
-                'last_update': 0,
-                'frame_count': 0
-            }
-            self.camera_locks[camera_id] = threading.Lock()
+        self.camera_data.setdefault(camera_id, {
+            'faces': {},
+            'last_update': 0,
+            'frame_count': 0
+        })
     
     def update_camera_data(self, camera_id, faces_data):
         """Update face data from a camera"""
-        if camera_id not in self.camera_data:
-            self.register_camera(camera_id)
-        
-        with self.camera_locks[camera_id]:
-            self.camera_data[camera_id]['faces'] = faces_data
-            self.camera_data[camera_id]['last_update'] = time.time()
-            self.camera_data[camera_id]['frame_count'] += 1
+        # Publish a fresh record with one assignment (atomic under the GIL), so
+        # readers always see a consistent faces/last_update/frame_count triple
+        with self._write_lock:
+            previous = self.camera_data.get(camera_id)
+            self.camera_data[camera_id] = {
+                'faces': faces_data,
+                'last_update': time.time(),
+                'frame_count': (previous['frame_count'] if previous else 0) + 1
+            }
     
     def cross_reference_detections(self):
         """Cross-reference detections between cameras to validate and improve accuracy"""
@@ -40,16 +44,17 @@ class DualCameraTracker:
         # Get all camera IDs
         camera_ids = list(self.camera_data.keys())
         
+        # Take one snapshot per camera up front; update_camera_data publishes
+        # new records rather than mutating them, so no lock or copy is needed
+        snapshot = {cam_id: self.camera_data[cam_id]['faces'] for cam_id in camera_ids}
+        
         # Compare each pair of cameras
         for i, cam1_id in enumerate(camera_ids):
             for cam2_id in camera_ids[i+1:]:
                 comparison_key = f"{cam1_id}_vs_{cam2_id}"
                 
-                with self.camera_locks[cam1_id]:
-                    cam1_faces = self.camera_data[cam1_id]['faces'].copy()
-                
-                with self.camera_locks[cam2_id]:
-                    cam2_faces = self.camera_data[cam2_id]['faces'].copy()
+                cam1_faces = snapshot[cam1_id]
+                cam2_faces = snapshot[cam2_id]
                 
                 # Cross-reference face counts
                 face_count_match = len(cam1_faces) == len(cam2_faces)
@@ -145,13 +150,10 @@ class DualCameraTracker:
                 
                 if pose1 and pose2:
                     # Compare yaw, pitch, roll (allow 5 degree tolerance)
-                    yaw_match = abs(pose1.get('yaw', 0) - pose2.get('yaw', 0)) <= 5
-                    pitch_match = abs(pose1.get('pitch', 0) - pose2.get('pitch', 0)) <= 5
-                    roll_match = abs(pose1.get('roll', 0) - pose2.get('roll', 0)) <= 5
-                    
-                    matches['yaw'] = yaw_match
-                    matches['pitch'] = pitch_match
-                    matches['roll'] = roll_match
+                    matches.update({
+                        axis: abs(pose1.get(axis, 0) - pose2.get(axis, 0)) <= POSE_TOLERANCE
+                        for axis in POSE_AXES
+                    })
         
         return matches
     
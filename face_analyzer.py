@@ -1,19 +1,73 @@
 import cv2
 import numpy as np
-from collections import defaultdict
+from collections import defaultdict, deque
+import threading
 import time
+import math
+from face_detection import load_yunet_model, create_yunet_detector, detect_faces_yunet, get_frontal_cascade
+
+# Positions kept per face track
+TRACK_HISTORY_LEN = 30
+
+# Between detections a face is searched for within this fraction of its
+# size around its last box, and kept in place below this match score
+FOLLOW_SEARCH = 0.25
+FOLLOW_MIN_SCORE = 0.5
+
+def new_track_history():
+    """Per-face position history that drops the oldest entry once full"""
+    return defaultdict(lambda: deque(maxlen=TRACK_HISTORY_LEN))
+
+def follow_box(prev_gray, gray, box):
+    """Re-locate box from prev_gray in gray by template matching near its last position"""
+    x, y, w, h = box
+    template = prev_gray[y:y+h, x:x+w]
+    mx, my = max(1, int(w * FOLLOW_SEARCH)), max(1, int(h * FOLLOW_SEARCH))
+    x0, y0 = max(0, x - mx), max(0, y - my)
+    window = gray[y0:y + h + my, x0:x + w + mx]
+    
+    # Box partly outside the frame - nothing reliable to match
+    if template.shape != (h, w) or window.shape[0] < h or window.shape[1] < w:
+        return box
+    
+    scores = cv2.matchTemplate(window, template, cv2.TM_CCOEFF_NORMED)
+    _, score, _, (bx, by) = cv2.minMaxLoc(scores)
+    if score < FOLLOW_MIN_SCORE:
+        return box
+    return (x0 + bx, y0 + by, w, h)
 
 class FaceAnalyzer:
     def __init__(self):
-        # Load face detection cascade
-        self.face_cascade = cv2.CascadeClassifier(
-            cv2.data.haarcascades + 'haarcascade_frontalface_default.xml'
-        )
+        # Per-thread detector state: the YuNet detector and scratch buffers
+        # aren't safe to share, and detection releases the GIL, so concurrent
+        # requests can detect in parallel with their own instances
+        self._local = threading.local()
+        
+        # YuNet CNN detector model, used instead of the cascade when available
+        self.yunet_model = load_yunet_model()
+        
+        # Guards tracking state and statistics shared between request threads
+        self._track_lock = threading.Lock()
+        
+        # Detection runs on a copy capped at this many pixels on the long side
+        self.detection_max_side = 640
+        
+        # Run the detector on every Nth frame and follow tracked faces by
+        # template matching in between (1 = detect every frame). Tracks are
+        # shared by all callers, so only raise this when frames come from a
+        # single camera
+        self.detect_stride = 1
+        self._frame_no = 0
+        self._last_gray = None
+        self._last_shape = None
         
         # Face tracking
-        self.face_tracks = {}  # Track faces across frames
+        # Track faces across frames: live track ids and their last boxes as
+        # parallel arrays, so matching runs on them without conversion
+        self._track_ids = np.empty(0, dtype=np.int64)
+        self._track_boxes = np.empty((0, 4), dtype=np.int32)
         self.next_face_id = 0
-        self.track_history = defaultdict(list)  # Store position history
+        self.track_history = new_track_history()  # Store position history
         
         # Statistics
         self.stats = {
@@ -23,6 +77,28 @@ class FaceAnalyzer:
             'session_start': time.time()
         }
         
+    @property
+    def face_cascade(self):
+        """Frontal face cascade for the calling thread, shared with FaceDetector"""
+        return get_frontal_cascade()
+    
+    def _scratch(self, name, shape):
+        """Per-thread uint8 buffer of the given shape, reallocated only when the shape changes"""
+        buf = getattr(self._local, name, None)
+        if buf is None or buf.shape != shape:
+            buf = np.empty(shape, dtype=np.uint8)
+            setattr(self._local, name, buf)
+        return buf
+    
+    @property
+    def face_yunet(self):
+        """YuNet detector for the calling thread"""
+        detector = getattr(self._local, 'face_yunet', None)
+        if detector is None:
+            detector = create_yunet_detector(self.yunet_model)
+            self._local.face_yunet = detector
+        return detector
+    
     def calculate_iou(self, box1, box2):
         """Calculate Intersection over Union (IoU) of two bounding boxes"""
         x1, y1, w1, h1 = box1
@@ -44,24 +120,52 @@ class FaceAnalyzer:
         
         return inter_area / union_area if union_area > 0 else 0
     
-    def track_faces(self, faces):
+    @property
+    def face_tracks(self):
+        """Live tracks as {face_id: (x, y, w, h)}"""
+        return dict(zip(self._track_ids.tolist(), map(tuple, self._track_boxes.tolist())))
+    
+    def iou_matrix(self, boxes1, boxes2):
+        """Pairwise IoU between two lists of (x, y, w, h) boxes as an N x M array"""
+        if len(boxes1) == 0 or len(boxes2) == 0:
+            return np.zeros((len(boxes1), len(boxes2)))
+        
+        a = np.asarray(boxes1, dtype=np.float64).reshape(-1, 4)
+        b = np.asarray(boxes2, dtype=np.float64).reshape(-1, 4)
+        
+        # Intersection rectangle for every pair via broadcasting
+        xi1 = np.maximum(a[:, None, 0], b[None, :, 0])
+        yi1 = np.maximum(a[:, None, 1], b[None, :, 1])
+        xi2 = np.minimum(a[:, None, 0] + a[:, None, 2], b[None, :, 0] + b[None, :, 2])
+        yi2 = np.minimum(a[:, None, 1] + a[:, None, 3], b[None, :, 1] + b[None, :, 3])
+        inter = np.clip(xi2 - xi1, 0, None) * np.clip(yi2 - yi1, 0, None)
+        
+        union = (a[:, 2] * a[:, 3])[:, None] + (b[:, 2] * b[:, 3])[None, :] - inter
+        return np.divide(inter, union, out=np.zeros_like(inter), where=union > 0)
+    
+    def track_faces(self, faces, now=None):
         """Track faces across frames and assign IDs"""
+        # One timestamp per frame; monotonic so speeds survive clock changes
+        if now is None:
+            now = time.monotonic()
         current_frame_ids = {}
         
+        # Score every detection against every existing track in one pass
+        track_ids = self._track_ids.tolist()
+        iou_matrix = self.iou_matrix(faces, self._track_boxes)
+        
         # Match current faces with existing tracks
-        for face in faces:
+        for i, face in enumerate(faces):
             x, y, w, h = face
             center = (x + w // 2, y + h // 2)
             
             best_match_id = None
-            best_iou = 0.3  # Minimum IoU threshold
             
-            # Find best matching track
-            for face_id, last_box in self.face_tracks.items():
-                iou = self.calculate_iou(face, last_box)
-                if iou > best_iou:
-                    best_iou = iou
-                    best_match_id = face_id
+            # Find best matching track above the minimum IoU threshold
+            if track_ids:
+                best = int(iou_matrix[i].argmax())
+                if iou_matrix[i, best] > 0.3:
+                    best_match_id = track_ids[best]
             
             # Assign ID
             if best_match_id is not None:
@@ -72,7 +176,6 @@ class FaceAnalyzer:
                 self.next_face_id += 1
                 self.stats['unique_faces_seen'] = max(self.stats['unique_faces_seen'], self.next_face_id)
             
-            self.face_tracks[face_id] = face
             current_frame_ids[face_id] = {
                 'box': face,
                 'center': center,
@@ -83,42 +186,98 @@ class FaceAnalyzer:
             # Update track history
             self.track_history[face_id].append({
                 'center': center,
-                'time': time.time(),
+                'time': now,
                 'area': w * h
             })
-            
-            # Keep only recent history (last 30 positions)
-            if len(self.track_history[face_id]) > 30:
-                self.track_history[face_id] = self.track_history[face_id][-30:]
         
-        # Remove old tracks (faces that disappeared)
-        disappeared_ids = set(self.face_tracks.keys()) - set(current_frame_ids.keys())
-        for face_id in disappeared_ids:
-            # Keep track for a bit in case face reappears
-            if face_id in self.face_tracks:
-                del self.face_tracks[face_id]
+        # Live tracks are exactly this frame's faces; ones that disappeared drop out
+        self._track_ids = np.fromiter(current_frame_ids.keys(), dtype=np.int64, count=len(current_frame_ids))
+        self._track_boxes = np.array([face['box'] for face in current_frame_ids.values()],
+                                     dtype=np.int32).reshape(-1, 4)
         
         return current_frame_ids
     
     def analyze_faces(self, frame):
         """Detect and analyze faces in a frame"""
-        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-        faces = self.face_cascade.detectMultiScale(
-            gray,
-            scaleFactor=1.1,
-            minNeighbors=5,
-            minSize=(30, 30)
-        )
-        
-        # Update statistics
-        self.stats['total_faces_detected'] += len(faces)
-        self.stats['max_faces_simultaneous'] = max(
-            self.stats['max_faces_simultaneous'], 
-            len(faces)
-        )
-        
-        # Track faces
-        tracked_faces = self.track_faces(faces)
+        now = time.monotonic()
+        
+        # Between detection frames follow the tracked faces instead, unless
+        # the frame size changed and their coordinates no longer apply
+        with self._track_lock:
+            follow = (self.detect_stride > 1 and self._frame_no % self.detect_stride != 0
+                      and self._last_shape == frame.shape[:2] and self._last_gray is not None)
+            self._frame_no += 1
+            if follow:
+                prev_gray = self._last_gray
+                boxes = self._track_boxes.tolist()
+        
+        # Downscale HD frames before detection; resizing first means the
+        # color conversion also runs on the smaller image. Both write into
+        # per-thread buffers that are reused while the frame size is stable
+        h, w = frame.shape[:2]
+        scale = min(1.0, self.detection_max_side / max(h, w))
+        if scale < 1.0:
+            size = (max(1, int(round(w * scale))), max(1, int(round(h * scale))))
+            small = cv2.resize(frame, size, dst=self._scratch('small', (size[1], size[0], 3)),
+                               interpolation=cv2.INTER_AREA)
+        else:
+            small = frame
+        
+        # Gray copy for the cascade, and for following faces when striding
+        gray = None
+        if self.yunet_model is None or self.detect_stride > 1:
+            gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY, dst=self._scratch('gray', small.shape[:2]))
+        
+        if follow:
+            # Boxes are matched in detection coordinates
+            faces = []
+            for box in boxes:
+                box = follow_box(prev_gray, gray, [int(round(v * scale)) for v in box])
+                faces.append(tuple(int(round(v / scale)) for v in box) if scale < 1.0 else box)
+            
+            with self._track_lock:
+                tracked_faces = self.track_faces(faces, now)
+                self._last_gray = gray.copy()
+            
+            return {
+                'faces': tracked_faces,
+                'count': len(faces),
+                'frame_width': frame.shape[1],
+                'frame_height': frame.shape[0]
+            }
+        
+        min_side = max(1, int(round(30 * scale)))
+        if self.yunet_model is not None:
+            faces = detect_faces_yunet(self.face_yunet, small, min_size=min_side)
+        else:
+            faces = self.face_cascade.detectMultiScale(
+                gray,
+                scaleFactor=1.1,
+                minNeighbors=5,
+                minSize=(min_side, min_side)
+            )
+        
+        # Convert the Nx4 detector array to plain int tuples in one call so the
+        # per-face box math below (IoU, centers, areas) avoids numpy scalar ops
+        faces = [tuple(face) for face in np.asarray(faces, dtype=np.int32).reshape(-1, 4).tolist()]
+        
+        # Map boxes back to full-resolution frame coordinates
+        if scale < 1.0:
+            faces = [tuple(int(round(v / scale)) for v in face) for face in faces]
+        
+        with self._track_lock:
+            # Update statistics
+            self.stats['total_faces_detected'] += len(faces)
+            self.stats['max_faces_simultaneous'] = max(
+                self.stats['max_faces_simultaneous'], 
+                len(faces)
+            )
+            
+            # Track faces
+            tracked_faces = self.track_faces(faces, now)
+            if self.detect_stride > 1:
+                self._last_gray = gray.copy()
+            self._last_shape = frame.shape[:2]
         
         # Calculate additional metrics
         analysis = {
@@ -148,14 +307,16 @@ class FaceAnalyzer:
     
     def calculate_movement_speed(self, face_id):
         """Calculate movement speed of a face"""
-        history = self.track_history.get(face_id, [])
-        if len(history) < 2:
+        history = self.track_history.get(face_id, ())
+        n = len(history)
+        if n < 2:
             return 0
         
-        # Calculate average speed over last few positions
+        # Calculate average speed over the last few positions (newest 5),
+        # indexing the deque in place rather than copying it
         speeds = []
-        for i in range(1, min(len(history), 5)):
-            prev = history[i-1]
+        prev = history[max(0, n - 5)]
+        for i in range(max(1, n - 4), n):
             curr = history[i]
             
             dx = curr['center'][0] - prev['center'][0]
@@ -163,10 +324,11 @@ class FaceAnalyzer:
             dt = curr['time'] - prev['time']
             
             if dt > 0:
-                speed = np.sqrt(dx**2 + dy**2) / dt
+                speed = math.hypot(dx, dy) / dt
                 speeds.append(speed)
+            prev = curr
         
-        return np.mean(speeds) if speeds else 0
+        return sum(speeds) / len(speeds) if speeds else 0
     
     def get_statistics(self):
         """Get overall statistics"""
@@ -179,15 +341,20 @@ class FaceAnalyzer:
     
     def reset_statistics(self):
         """Reset statistics"""
-        self.stats = {
-            'total_faces_detected': 0,
-            'unique_faces_seen': 0,
-            'max_faces_simultaneous': 0,
-            'session_start': time.time()
-        }
-        self.face_tracks = {}
-        self.track_history = defaultdict(list)
-        self.next_face_id = 0
+        with self._track_lock:
+            self.stats = {
+                'total_faces_detected': 0,
+                'unique_faces_seen': 0,
+                'max_faces_simultaneous': 0,
+                'session_start': time.time()
+            }
+            self._track_ids = np.empty(0, dtype=np.int64)
+            self._track_boxes = np.empty((0, 4), dtype=np.int32)
+            self.track_history = new_track_history()
+            self.next_face_id = 0
+            self._frame_no = 0
+            self._last_gray = None
+            self._last_shape = None
 
     def reset_session(self):
         """Alias for reset_statistics for compatibility"""
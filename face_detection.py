@@ -1,52 +1,220 @@
 import cv2
+import numpy as np
+import urllib.request
+import os
 import sys
+import tempfile
+import threading
 
-class FaceDetector:
-    def __init__(self):
-        # Load the pre-trained face cascade classifier
-        # OpenCV includes this by default
-        self.face_cascade = cv2.CascadeClassifier(
+# YuNet CNN face detector from the OpenCV model zoo (needs OpenCV >= 4.8)
+YUNET_MODEL_PATH = 'models/face_detection_yunet_2023mar.onnx'
+YUNET_MODEL_URL = 'https://github.com/opencv/opencv_zoo/raw/main/models/face_detection_yunet/face_detection_yunet_2023mar.onnx'
+
+# Result of the first load_yunet_model call, shared by every detector
+_yunet_model = False
+
+def load_yunet_model():
+    """Return the YuNet model path, downloading it if needed, or None if unavailable"""
+    global _yunet_model
+    if _yunet_model is False:
+        _yunet_model = _fetch_yunet_model()
+    return _yunet_model
+
+def _fetch_yunet_model():
+    """Download and validate the YuNet model once"""
+    if not hasattr(cv2, 'FaceDetectorYN'):
+        return None
+    
+    try:
+        if not os.path.exists(YUNET_MODEL_PATH):
+            os.makedirs(os.path.dirname(YUNET_MODEL_PATH), exist_ok=True)
+            print("Downloading YuNet face detection model...")
+            # Download next to the target and rename it into place, so other
+            # workers starting at the same time never see a half-written file
+            fd, tmp_path = tempfile.mkstemp(suffix='.part', dir=os.path.dirname(YUNET_MODEL_PATH))
+            os.close(fd)
+            try:
+                urllib.request.urlretrieve(YUNET_MODEL_URL, tmp_path)
+                os.replace(tmp_path, YUNET_MODEL_PATH)
+            except Exception:
+                # Don't leave a truncated file behind
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                raise
+        
+        # Make sure the file actually loads before anyone relies on it
+        create_yunet_detector(YUNET_MODEL_PATH)
+        return YUNET_MODEL_PATH
+    except Exception as e:
+        print(f"Could not load YuNet face detector: {e}")
+        print("Falling back to Haar Cascade")
+        return None
+
+def create_yunet_detector(model_path, input_size=(320, 240)):
+    """Create a YuNet detector; instances are stateful, so use one per thread"""
+    return cv2.FaceDetectorYN.create(model_path, "", input_size)
+
+def detect_faces_yunet(detector, frame, min_size=0):
+    """Run YuNet on a BGR frame and return an Nx4 int32 array of x, y, w, h boxes"""
+    h, w = frame.shape[:2]
+    detector.setInputSize((w, h))
+    _, faces = detector.detect(frame)
+    if faces is None:
+        return np.empty((0, 4), dtype=np.int32)
+    
+    # Rows are box + 5 landmarks + score; keep the box clipped to the frame
+    boxes = np.rint(faces[:, :4]).astype(np.int32)
+    x1 = np.clip(boxes[:, 0], 0, w)
+    y1 = np.clip(boxes[:, 1], 0, h)
+    x2 = np.clip(boxes[:, 0] + boxes[:, 2], 0, w)
+    y2 = np.clip(boxes[:, 1] + boxes[:, 3], 0, h)
+    boxes = np.stack([x1, y1, x2 - x1, y2 - y1], axis=1)
+    
+    keep = (boxes[:, 2] >= max(min_size, 1)) & (boxes[:, 3] >= max(min_size, 1))
+    return boxes[keep]
+
+# Per-thread cascade shared by every detector instance: CascadeClassifier
+# isn't safe to use from several threads at once, but there is no reason
+# to parse the XML again for each object on the same thread
+_cascade_local = threading.local()
+
+def get_frontal_cascade():
+    """Frontal face Haar cascade for the calling thread, loaded on first use"""
+    cascade = getattr(_cascade_local, 'face_cascade', None)
+    if cascade is None:
+        cascade = cv2.CascadeClassifier(
             cv2.data.haarcascades + 'haarcascade_frontalface_default.xml'
         )
+        _cascade_local.face_cascade = cascade
+    return cascade
+
+# Unit rectangle corners, scaled by (w, h) and offset by (x, y) per face
+RECT_CORNERS = np.array([[0, 0], [1, 0], [1, 1], [0, 1]], dtype=np.int32)
+
+class FaceDetector:
+    def __init__(self):
+        # Prefer the YuNet CNN detector; it is faster and more accurate than
+        # the Haar cascade's sliding-window scan
+        model_path = load_yunet_model()
+        self.yunet = create_yunet_detector(model_path) if model_path else None
         
+        # Detection runs on a copy scaled down to this width
+        self.detection_width = 320
+        
+        # Scratch buffers reused across frames by the resize and gray steps
+        self._small = None
+        self._gray = None
+        
+    @property
+    def face_cascade(self):
+        """Pre-trained face cascade classifier (OpenCV includes this by default)"""
+        return get_frontal_cascade()
+    
     def detect_faces(self, frame):
         """Detect faces in a frame and return coordinates"""
-        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-        faces = self.face_cascade.detectMultiScale(
-            gray,
-            scaleFactor=1.1,
-            minNeighbors=5,
-            minSize=(30, 30)
-        )
-        return faces
+        h, w = frame.shape[:2]
+        scale = min(1.0, self.detection_width / w)
+        if scale < 1.0:
+            size = (self.detection_width, max(1, int(round(h * scale))))
+            if self._small is None or self._small.shape[:2] != (size[1], size[0]):
+                self._small = np.empty((size[1], size[0], 3), dtype=np.uint8)
+            small = cv2.resize(frame, size, dst=self._small, interpolation=cv2.INTER_AREA)
+        else:
+            small = frame
+        min_side = max(1, int(round(30 * scale)))
+        
+        if self.yunet is not None:
+            faces = detect_faces_yunet(self.yunet, small, min_size=min_side)
+        else:
+            # Convert into a buffer reused across frames instead of allocating
+            # a new gray image every call
+            if self._gray is None or self._gray.shape != small.shape[:2]:
+                self._gray = np.empty(small.shape[:2], dtype=np.uint8)
+            gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY, dst=self._gray)
+            faces = self.face_cascade.detectMultiScale(
+                gray,
+                scaleFactor=1.1,
+                minNeighbors=5,
+                minSize=(min_side, min_side)
+            )
+        
+        # Map boxes back to full-resolution frame coordinates
+        faces = np.asarray(faces, dtype=np.float64).reshape(-1, 4)
+        return np.rint(faces / scale).astype(np.int32)
     
     def draw_detections(self, frame, faces):
         """Draw rectangles around detected faces"""
-        for (x, y, w, h) in faces:
-            # Draw rectangle around face
-            cv2.rectangle(frame, (x, y), (x + w, y + h), (0, 255, 0), 2)
-            
+        boxes = np.asarray(faces, dtype=np.int32).reshape(-1, 1, 4)
+        if len(boxes) == 0:
+            return frame
+        
+        # Draw every face rectangle in one polylines call
+        outlines = RECT_CORNERS * boxes[:, :, 2:] + boxes[:, :, :2]
+        cv2.polylines(frame, outlines, True, (0, 255, 0), 2)
+        
+        for (x, y, w, h) in boxes[:, 0].tolist():
             # Add face count label
             cv2.putText(frame, f'Face', (x, y - 10),
                        cv2.FONT_HERSHEY_SIMPLEX, 0.9, (0, 255, 0), 2)
         
         return frame
 
+class LatestSlot:
+    """Single-slot mailbox: publishing overwrites any value not yet taken"""
+    def __init__(self):
+        self._value = None
+        self._cond = threading.Condition()
+    
+    def publish(self, value):
+        """Store value, replacing whatever is waiting"""
+        with self._cond:
+            self._value = value
+            self._cond.notify()
+    
+    def take(self, timeout=None):
+        """Wait for a value and remove it from the slot (None on timeout)"""
+        with self._cond:
+            if self._value is None:
+                self._cond.wait(timeout)
+            value, self._value = self._value, None
+            return value
+    
+    def peek(self):
+        """Return the current value without removing it"""
+        return self._value
+
+def detection_worker(detector, frames, results, stop):
+    """Detect faces on the newest published frame until stop is set"""
+    while not stop.is_set():
+        frame = frames.take(timeout=0.1)
+        if frame is None:
+            continue
+        results.publish(detector.detect_faces(frame))
+
 def main():
     # Initialize face detector
     detector = FaceDetector()
     
     # Detect and use laptop camera (not iPhone)
-    from camera_utils import get_camera_index
+    from camera_utils import get_camera_index, get_capture_backend
     camera_index = get_camera_index()
     
-    # Initialize camera
-    cap = cv2.VideoCapture(camera_index)
+    # Initialize camera with the same native backend used to probe it
+    cap = cv2.VideoCapture(camera_index, get_capture_backend())
     
     if not cap.isOpened():
         print("Error: Could not open camera")
         sys.exit(1)
     
+    # Keep only the newest frame in the driver queue so detection never runs
+    # on stale frames (ignored by backends that don't support it)
+    cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+    
+    # Ask for MJPEG before the resolution: raw YUYV at 640x480@30 is ~18 MB/s
+    # over USB, MJPEG a fraction of that, and the decode is cheap with
+    # libjpeg-turbo's SIMD paths (ignored by cameras that don't offer it)
+    cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*'MJPG'))
+    
     # Set camera resolution (optional, for better performance)
     cap.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
     cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
@@ -54,6 +222,14 @@ def main():
     print("Face Detection Started!")
     print("Press 'q' to quit")
     
+    # Detection runs on its own thread so capture and display never wait on
+    # it; it always picks up the newest frame and skips any it fell behind on
+    frames = LatestSlot()
+    results = LatestSlot()
+    stop = threading.Event()
+    worker = threading.Thread(target=detection_worker, args=(detector, frames, results, stop), daemon=True)
+    worker.start()
+    
     face_count = 0
     
     while True:
@@ -64,11 +240,18 @@ def main():
             print("Error: Could not read frame")
             break
         
-        # Flip frame horizontally for mirror effect (optional)
-        frame = cv2.flip(frame, 1)
+        # Flip frame horizontally for mirror effect (optional), in place
+        cv2.flip(frame, 1, dst=frame)
         
-        # Detect faces
-        faces = detector.detect_faces(frame)
+        # Hand the frame to the detector and draw on a copy - the detection
+        # worker reads the published frame, so the copy is the one per-frame
+        # drawing buffer. Boxes are the most recent result, typically from
+        # the previous frame
+        frames.publish(frame)
+        frame = frame.copy()
+        faces = results.peek()
+        if faces is None:
+            faces = ()
         face_count = len(faces)
         
         # Draw detections
@@ -90,6 +273,8 @@ def main():
             break
     
     # Clean up
+    stop.set()
+    worker.join()
     cap.release()
     cv2.destroyAllWindows()
     print("Face detection stopped.")
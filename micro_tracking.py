@@ -1,7 +1,19 @@
-import cv2
-import numpy as np
-from collections import deque
-import time
+from collections import deque, Counter
+import math
+
+def _step(dx, dy, dt):
+    """Distance and speed of a (dx, dy) move over dt seconds"""
+    distance = math.hypot(dx, dy)
+    return distance, (distance / dt if dt > 0 else 0)
+
+def _newest(items, n):
+    """The newest n entries of a deque or list, oldest first, without copying the rest"""
+    start = max(0, len(items) - n)
+    return [items[i] for i in range(start, len(items))]
+
+def _mean(values):
+    """Arithmetic mean of a short list (0 when empty)"""
+    return sum(values) / len(values) if values else 0
 
 class MicroExpressionTracker:
     def __init__(self):
@@ -17,9 +29,13 @@ class MicroExpressionTracker:
             return None
         
         if face_id not in self.eye_movement_history:
+            # One deque per field (struct-of-arrays) instead of a dict per
+            # frame, so recent-speed windows read plain floats
             self.eye_movement_history[face_id] = {
-                'positions': deque(maxlen=30),  # Last 30 positions
-                'movements': deque(maxlen=20),  # Movement vectors
+                'x': deque(maxlen=30),  # Last 30 positions
+                'y': deque(maxlen=30),
+                'times': deque(maxlen=30),
+                'speeds': deque(maxlen=20),  # Movement speeds
                 'saccades': [],  # Rapid eye movements
                 'fixations': [],  # Stable gaze points
                 'total_distance': 0,
@@ -36,37 +52,16 @@ class MicroExpressionTracker:
             (left_eye[1] + right_eye[1]) / 2
         )
         
-        # Store position with timestamp
-        current_pos = {
-            'x': eye_center[0],
-            'y': eye_center[1],
-            'time': frame_time,
-            'left_eye': left_eye,
-            'right_eye': right_eye
-        }
-        
         # Calculate movement if we have previous position
-        if len(history['positions']) > 0:
-            prev_pos = history['positions'][-1]
-            
+        if history['times']:
             # Calculate movement vector
-            dx = eye_center[0] - prev_pos['x']
-            dy = eye_center[1] - prev_pos['y']
-            dt = frame_time - prev_pos['time']
-            
-            distance = np.sqrt(dx**2 + dy**2)
-            speed = distance / dt if dt > 0 else 0
+            dx = eye_center[0] - history['x'][-1]
+            dy = eye_center[1] - history['y'][-1]
+            dt = frame_time - history['times'][-1]
             
-            movement = {
-                'dx': dx,
-                'dy': dy,
-                'distance': distance,
-                'speed': speed,
-                'angle': np.degrees(np.arctan2(dy, dx)) if dx != 0 else 0,
-                'time': frame_time
-            }
+            distance, speed = _step(dx, dy, dt)
             
-            history['movements'].append(movement)
+            history['speeds'].append(speed)
             history['total_distance'] += distance
             
             # Detect saccades (rapid eye movements)
@@ -74,16 +69,15 @@ class MicroExpressionTracker:
                 history['saccades'].append({
                     'time': frame_time,
                     'speed': speed,
-                    'direction': movement['angle']
+                    'direction': math.degrees(math.atan2(dy, dx)) if dx != 0 else 0
                 })
                 # Keep only recent saccades
                 if len(history['saccades']) > 50:
                     history['saccades'] = history['saccades'][-50:]
             
             # Detect fixations (stable gaze)
-            if speed < 1 and len(history['movements']) >= 5:
-                recent_speeds = [m['speed'] for m in list(history['movements'])[-5:]]
-                if all(s < 1 for s in recent_speeds):
+            if speed < 1 and len(history['speeds']) >= 5:
+                if all(s < 1 for s in _newest(history['speeds'], 5)):
                     history['fixations'].append({
                         'x': eye_center[0],
                         'y': eye_center[1],
@@ -93,12 +87,14 @@ class MicroExpressionTracker:
                     if len(history['fixations']) > 20:
                         history['fixations'] = history['fixations'][-20:]
         
-        history['positions'].append(current_pos)
+        # Store position with timestamp
+        history['x'].append(eye_center[0])
+        history['y'].append(eye_center[1])
+        history['times'].append(frame_time)
         
         # Calculate average speed
-        if len(history['movements']) > 0:
-            recent_speeds = [m['speed'] for m in list(history['movements'])[-10:]]
-            history['average_speed'] = np.mean(recent_speeds) if recent_speeds else 0
+        if history['speeds']:
+            history['average_speed'] = _mean(_newest(history['speeds'], 10))
         
         # Determine movement pattern
         movement_pattern = self.analyze_eye_pattern(history)
@@ -116,14 +112,10 @@ class MicroExpressionTracker:
     
     def analyze_eye_pattern(self, history):
         """Analyze eye movement patterns"""
-        if len(history['movements']) < 5:
+        if len(history['speeds']) < 5:
             return 'Stable'
         
-        recent_movements = list(history['movements'])[-10:]
-        speeds = [m['speed'] for m in recent_movements]
-        angles = [m['angle'] for m in recent_movements]
-        
-        avg_speed = np.mean(speeds)
+        avg_speed = _mean(_newest(history['speeds'], 10))
         
         if avg_speed < 1:
             return 'Fixed Gaze'
@@ -141,10 +133,11 @@ class MicroExpressionTracker:
         
         if face_id not in self.mouth_movement_history:
             self.mouth_movement_history[face_id] = {
-                'positions': deque(maxlen=30),
-                'shapes': deque(maxlen=30),
+                'x': deque(maxlen=30),
+                'y': deque(maxlen=30),
+                'times': deque(maxlen=30),
                 'openings': deque(maxlen=30),
-                'movements': deque(maxlen=20),
+                'speeds': deque(maxlen=20),
                 'total_movement': 0
             }
         
@@ -155,73 +148,43 @@ class MicroExpressionTracker:
         mouth_right = landmarks.get('mouth_right', (0, 0))
         
         # Calculate mouth width and opening
-        mouth_width = np.sqrt(
-            (mouth_right[0] - mouth_left[0])**2 + 
-            (mouth_right[1] - mouth_left[1])**2
-        )
+        mouth_width = math.hypot(mouth_right[0] - mouth_left[0], mouth_right[1] - mouth_left[1])
         
         # Estimate mouth opening (vertical distance from center)
         face_height = face_box[3]
         mouth_opening_ratio = mouth_width / face_height if face_height > 0 else 0
         
-        current_state = {
-            'center': mouth_center,
-            'width': mouth_width,
-            'opening_ratio': mouth_opening_ratio,
-            'time': frame_time,
-            'left': mouth_left,
-            'right': mouth_right
-        }
-        
         # Calculate movement
-        if len(history['positions']) > 0:
-            prev_state = history['positions'][-1]
-            
-            dx = mouth_center[0] - prev_state['center'][0]
-            dy = mouth_center[1] - prev_state['center'][1]
-            dt = frame_time - prev_state['time']
-            
-            distance = np.sqrt(dx**2 + dy**2)
-            speed = distance / dt if dt > 0 else 0
+        if history['times']:
+            dx = mouth_center[0] - history['x'][-1]
+            dy = mouth_center[1] - history['y'][-1]
+            dt = frame_time - history['times'][-1]
             
-            # Detect opening/closing
-            opening_change = mouth_opening_ratio - prev_state['opening_ratio']
+            distance, speed = _step(dx, dy, dt)
             
-            movement = {
-                'dx': dx,
-                'dy': dy,
-                'distance': distance,
-                'speed': speed,
-                'opening_change': opening_change,
-                'time': frame_time
-            }
-            
-            history['movements'].append(movement)
+            history['speeds'].append(speed)
             history['total_movement'] += distance
         
-        history['positions'].append(current_state)
-        history['shapes'].append({
-            'width': mouth_width,
-            'opening': mouth_opening_ratio,
-            'time': frame_time
-        })
+        history['x'].append(mouth_center[0])
+        history['y'].append(mouth_center[1])
+        history['times'].append(frame_time)
         history['openings'].append(mouth_opening_ratio)
         
         # Analyze mouth state
         mouth_state = self.analyze_mouth_state(history)
         
         # Calculate average opening
-        avg_opening = np.mean(list(history['openings'])[-10:]) if history['openings'] else 0
+        avg_opening = _mean(_newest(history['openings'], 10))
         
         return {
             'current_position': mouth_center,
             'width': mouth_width,
             'opening_ratio': mouth_opening_ratio,
             'average_opening': avg_opening,
-            'movement_speed': np.mean([m['speed'] for m in list(history['movements'])[-10:]]) if history['movements'] else 0,
+            'movement_speed': _mean(_newest(history['speeds'], 10)),
             'total_movement': history['total_movement'],
             'state': mouth_state,
-            'is_moving': len(history['movements']) > 0 and history['movements'][-1]['speed'] > 2
+            'is_moving': len(history['speeds']) > 0 and history['speeds'][-1] > 2
         }
     
     def analyze_mouth_state(self, history):
@@ -229,8 +192,7 @@ class MicroExpressionTracker:
         if not history['openings']:
             return 'Unknown'
         
-        recent_openings = list(history['openings'])[-5:]
-        current_opening = recent_openings[-1] if recent_openings else 0
+        current_opening = history['openings'][-1]
         
         if current_opening < 0.15:
             return 'Closed'
@@ -268,7 +230,7 @@ class MicroExpressionTracker:
         micro_expressions = []
         
         if len(history['expressions']) >= 3:
-            recent = list(history['expressions'])[-3:]
+            recent = _newest(history['expressions'], 3)
             
             # Check for brief expression changes
             if recent[0]['expression'] != recent[1]['expression']:
@@ -314,12 +276,8 @@ class MicroExpressionTracker:
             return 'Stable expression'
         
         # Count expression types
-        expr_counts = {}
-        for me in recent:
-            expr = me['expression']
-            expr_counts[expr] = expr_counts.get(expr, 0) + 1
-        
-        most_common = max(expr_counts.items(), key=lambda x: x[1]) if expr_counts else None
+        expr_counts = Counter(me['expression'] for me in recent)
+        most_common = expr_counts.most_common(1)[0] if expr_counts else None
         
         if most_common and most_common[1] >= 3:
             return f'Frequent {most_common[0]} micro-expressions'
@@ -333,8 +291,7 @@ class MicroExpressionTracker:
         if len(history['expressions']) < 5:
             return 1.0
         
-        recent = list(history['expressions'])[-10:]
-        expressions = [e['expression'] for e in recent]
+        expressions = [e['expression'] for e in _newest(history['expressions'], 10)]
         
         # Count unique expressions
         unique_count = len(set(expressions))
@@ -348,16 +305,14 @@ class MicroExpressionTracker:
     def get_movement_trajectory(self, face_id, feature_type='eye'):
         """Get movement trajectory for visualization"""
         if feature_type == 'eye':
-            history = self.eye_movement_history.get(face_id, {})
-            positions = history.get('positions', [])
+            history = self.eye_movement_history.get(face_id)
         else:
-            history = self.mouth_movement_history.get(face_id, {})
-            positions = history.get('positions', [])
+            history = self.mouth_movement_history.get(face_id)
         
-        if not positions:
+        if not history or not history['times']:
             return []
         
-        return [(p['x'], p['y']) for p in list(positions)[-20:]]  # Last 20 positions
+        return list(zip(_newest(history['x'], 20), _newest(history['y'], 20)))  # Last 20 positions
     
     def reset_tracking(self, face_id):
         """Reset tracking for a face"""
@@ -367,5 +322,11 @@ class MicroExpressionTracker:
             del self.mouth_movement_history[face_id]
         if face_id in self.expression_change_history:
             del self.expression_change_history[face_id]
+    
+    def reset(self):
+        """Reset tracking for all faces"""
+        self.eye_movement_history.clear()
+        self.mouth_movement_history.clear()
+        self.expression_change_history.clear()
 
 
@@ -1,54 +1,125 @@
 import cv2
 import numpy as np
-import math
+from math import atan2, degrees, floor, hypot, pi
+from collections import deque
+from micro_tracking import _newest
+
+# Samples kept per eye
+EYE_HISTORY_LEN = 30
+
+# An eye counts as open while its EAR is above this; the open flag is stored
+# with each sample so blink detection never re-tests the EAR history
+BLINK_EAR_THRESHOLD = 0.2
+
+# Quadrant order, indexed by right half + 2 * bottom half
+QUADRANT_NAMES = ('top_left', 'top_right', 'bottom_left', 'bottom_right')
+
+# 45-degree movement sectors, counter-clockwise from 'Right' (image y points down)
+_DIRECTION_LABELS = ('Right', 'Down-Right', 'Down', 'Down-Left',
+                     'Left', 'Up-Left', 'Up', 'Up-Right')
+_SECTORS_PER_RADIAN = 4 / pi
+
+# Every head orientation label, keyed by the sign of (pitch, yaw, roll)
+# beyond their thresholds (1 above, -1 below, 0 within)
+_ORIENTATIONS = {
+    (p, yw, r): ' '.join(label for label in (p_label, yw_label, r_label) if label) or 'Frontal'
+    for p, p_label in ((1, 'Looking Up'), (0, ''), (-1, 'Looking Down'))
+    for yw, yw_label in ((1, 'Right'), (0, ''), (-1, 'Left'))
+    for r, r_label in ((1, 'Tilted Right'), (0, ''), (-1, 'Tilted Left'))
+}
+
+# Movement result for a face whose quadrant centers haven't moved; shared by
+# every still frame, so callers must treat it as read-only
+_STILL_MOVEMENT = {q: {'movement': 0.0, 'stability': 1.0, 'direction': 'Stable'} for q in QUADRANT_NAMES}
+
+def _direction_label(dx, dy, still):
+    """8-way direction of a (dx, dy) step, 'Stable' when both are under still"""
+    if abs(dx) < still and abs(dy) < still:
+        return 'Stable'
+    
+    # Sector i covers [45*i - 22.5, 45*i + 22.5) degrees; & 7 wraps the
+    # negative angles of the upper half-plane onto sectors 4-7
+    return _DIRECTION_LABELS[floor(atan2(dy, dx) * _SECTORS_PER_RADIAN + 0.5) & 7]
+
+def _eye_aspect_ratio(eye_center, corner):
+    """Simplified EAR from the eye center to its corner (0.3 when they share a column)"""
+    horizontal = abs(eye_center[0] - corner[0])
+    if horizontal > 0:
+        return abs(eye_center[1] - corner[1]) / horizontal
+    return 0.3
+
+def _new_eye_history():
+    """Per-eye samples as one bounded deque per field (struct-of-arrays)"""
+    history = {field: deque(maxlen=EYE_HISTORY_LEN) for field in ('x', 'y', 'open', 'time')}
+    
+    # Blink state carried between frames: samples seen so far, the open
+    # blink's (sample number, time) and the closing sample numbers of
+    # completed blinks, dropped once they leave the window
+    history.update({'seq': 0, 'blink_start': None, 'blinks': deque()})
+    return history
+
+def _new_sync_state():
+    """Synchronized-blink state for a face, carried between frames like the per-eye state"""
+    return {'left_start': None, 'right_start': None, 'left_in': False, 'right_in': False,
+            'blinks': deque()}
+
+def _drop_expired(blinks, oldest):
+    """Drop blinks that closed at or before sample number oldest; returns how many remain"""
+    while blinks and blinks[0] <= oldest:
+        blinks.popleft()
+    return len(blinks)
 
 class QuadrantTracker:
     def __init__(self):
         pass
     
-    def divide_face_quadrants(self, face_box, landmarks):
-        """Divide face into 4 quadrants and analyze each"""
-        if not landmarks:
-            return None
-        
+    def quadrant_layout(self, face_box):
+        """Bounds and centers of the 4 face quadrants, with empty feature lists"""
         x, y, w, h = face_box[:4]
-        center_x = x + w // 2
-        center_y = y + h // 2
         
-        quadrants = {
+        # Left/top halves and the right/bottom remainders, plus the quadrant
+        # center coordinates they imply - everything below is built from these
+        hw, hh = w // 2, h // 2
+        rw, rh = w - hw, h - hh
+        center_x, center_y = x + hw, y + hh
+        left_cx, right_cx = x + hw // 2, center_x + rw // 2
+        top_cy, bottom_cy = y + hh // 2, center_y + rh // 2
+        
+        return {
             'top_left': {
-                'bounds': (x, y, center_x - x, center_y - y),
-                'center': (x + (center_x - x) // 2, y + (center_y - y) // 2),
+                'bounds': (x, y, hw, hh),
+                'center': (left_cx, top_cy),
                 'features': []
             },
             'top_right': {
-                'bounds': (center_x, y, x + w - center_x, center_y - y),
-                'center': (center_x + (x + w - center_x) // 2, y + (center_y - y) // 2),
+                'bounds': (center_x, y, rw, hh),
+                'center': (right_cx, top_cy),
                 'features': []
             },
             'bottom_left': {
-                'bounds': (x, center_y, center_x - x, y + h - center_y),
-                'center': (x + (center_x - x) // 2, center_y + (y + h - center_y) // 2),
+                'bounds': (x, center_y, hw, rh),
+                'center': (left_cx, bottom_cy),
                 'features': []
             },
             'bottom_right': {
-                'bounds': (center_x, center_y, x + w - center_x, y + h - center_y),
-                'center': (center_x + (x + w - center_x) // 2, center_y + (y + h - center_y) // 2),
+                'bounds': (center_x, center_y, rw, rh),
+                'center': (right_cx, bottom_cy),
                 'features': []
             }
         }
+    
+    def divide_face_quadrants(self, face_box, landmarks):
+        """Divide face into 4 quadrants and analyze each"""
+        if not landmarks:
+            return None
         
-        # Map landmarks to quadrants
-        for name, point in landmarks.items():
-            px, py = point
-            if px < center_x and py < center_y:
-                quadrants['top_left']['features'].append(name)
-            elif px >= center_x and py < center_y:
-                quadrants['top_right']['features'].append(name)
-            elif px < center_x and py >= center_y:
-                quadrants['bottom_left']['features'].append(name)
-            else:
-                quadrants['bottom_right']['features'].append(name)
+        # Bucket each landmark by its QUADRANT_NAMES index
+        quadrants = self.quadrant_layout(face_box)
+        center_x = face_box[0] + face_box[2] // 2
+        center_y = face_box[1] + face_box[3] // 2
+        features = [quadrants[name]['features'] for name in QUADRANT_NAMES]
+        for name, (px, py) in landmarks.items():
+            features[(px >= center_x) + 2 * (py >= center_y)].append(name)
         
         return quadrants
     
@@ -57,61 +128,43 @@ class QuadrantTracker:
         if not prev_quadrants:
             return {q: {'movement': 0, 'stability': 1.0} for q in quadrants.keys()}
         
+        # A still face (the common case) moves no quadrant at all
+        if quadrants.keys() == prev_quadrants.keys() == _STILL_MOVEMENT.keys() and all(
+                quadrant['center'] == prev_quadrants[q_name]['center'] for q_name, quadrant in quadrants.items()):
+            return _STILL_MOVEMENT
+        
         quadrant_analysis = {}
-        for q_name in quadrants.keys():
-            if q_name in prev_quadrants:
-                curr_center = quadrants[q_name]['center']
-                prev_center = prev_quadrants[q_name]['center']
-                
-                dx = curr_center[0] - prev_center[0]
-                dy = curr_center[1] - prev_center[1]
-                movement = math.sqrt(dx**2 + dy**2)
-                
-                # Stability is inverse of movement
-                stability = max(0, 1.0 - (movement / 50))  # Normalize
-                
-                quadrant_analysis[q_name] = {
-                    'movement': movement,
-                    'stability': stability,
-                    'direction': self.get_direction(dx, dy)
-                }
-            else:
-                quadrant_analysis[q_name] = {
-                    'movement': 0,
-                    'stability': 1.0,
-                    'direction': 'None'
-                }
+        for q_name, quadrant in quadrants.items():
+            prev = prev_quadrants.get(q_name)
+            if prev is None:
+                quadrant_analysis[q_name] = {'movement': 0, 'stability': 1.0, 'direction': 'None'}
+                continue
+            
+            (cx, cy), (px, py) = quadrant['center'], prev['center']
+            dx, dy = cx - px, cy - py
+            movement = hypot(dx, dy)
+            
+            # Stability is inverse of movement, normalized to 50px
+            quadrant_analysis[q_name] = {
+                'movement': movement,
+                'stability': max(0, 1.0 - movement / 50),
+                'direction': _direction_label(dx, dy, 2)
+            }
         
         return quadrant_analysis
     
     def get_direction(self, dx, dy):
         """Get movement direction"""
-        if abs(dx) < 2 and abs(dy) < 2:
-            return 'Stable'
-        
-        angle = math.degrees(math.atan2(dy, dx))
-        
-        if -22.5 <= angle < 22.5:
-            return 'Right'
-        elif 22.5 <= angle < 67.5:
-            return 'Down-Right'
-        elif 67.5 <= angle < 112.5:
-            return 'Down'
-        elif 112.5 <= angle < 157.5:
-            return 'Down-Left'
-        elif 157.5 <= angle or angle < -157.5:
-            return 'Left'
-        elif -157.5 <= angle < -112.5:
-            return 'Up-Left'
-        elif -112.5 <= angle < -67.5:
-            return 'Up'
-        else:
-            return 'Up-Right'
+        return _direction_label(dx, dy, 2)
 
 class EyeTracker:
     def __init__(self):
         self.eye_history = {}  # Track each eye separately
     
+    def reset(self):
+        """Reset tracking for all faces"""
+        self.eye_history.clear()
+    
     def track_individual_eyes(self, landmarks, face_box, face_id, frame_time):
         """Track left and right eyes separately with detailed metrics"""
         if not landmarks or 'left_eye' not in landmarks:
@@ -119,8 +172,9 @@ class EyeTracker:
         
         if face_id not in self.eye_history:
             self.eye_history[face_id] = {
-                'left': {'positions': [], 'openness_history': []},
-                'right': {'positions': [], 'openness_history': []}
+                'left': _new_eye_history(),
+                'right': _new_eye_history(),
+                'sync': _new_sync_state()
             }
         
         history = self.eye_history[face_id]
@@ -131,60 +185,43 @@ class EyeTracker:
         right_corner = landmarks.get('right_eye_corner', (0, 0))
         
         # Calculate Eye Aspect Ratio (EAR) for each eye
-        def calculate_ear(eye_center, corner):
-            # Simplified EAR - distance from center to corner
-            vertical = abs(eye_center[1] - corner[1])
-            horizontal = abs(eye_center[0] - corner[0])
-            if horizontal > 0:
-                return vertical / horizontal
-            return 0.3
-        
-        left_ear = calculate_ear(left_eye, left_corner)
-        right_ear = calculate_ear(right_eye, right_corner)
+        left_ear = _eye_aspect_ratio(left_eye, left_corner)
+        right_ear = _eye_aspect_ratio(right_eye, right_corner)
         
         # Determine open/closed state
-        blink_threshold = 0.2
-        left_open = left_ear > blink_threshold
-        right_open = right_ear > blink_threshold
-        
-        # Track positions
-        history['left']['positions'].append({
-            'position': left_eye,
-            'ear': left_ear,
-            'open': left_open,
-            'time': frame_time
-        })
-        history['right']['positions'].append({
-            'position': right_eye,
-            'ear': right_ear,
-            'open': right_open,
-            'time': frame_time
-        })
-        
-        # Keep only recent history
-        if len(history['left']['positions']) > 30:
-            history['left']['positions'] = history['left']['positions'][-30:]
-        if len(history['right']['positions']) > 30:
-            history['right']['positions'] = history['right']['positions'][-30:]
+        left_open = left_ear > BLINK_EAR_THRESHOLD
+        right_open = right_ear > BLINK_EAR_THRESHOLD
+        
+        # Advance the blink state machines by this frame only; they read the
+        # previous open flags, so run them before the samples are appended
+        self.update_synchronized_blinks(history, left_open, right_open, frame_time)
+        
+        # Track positions; the bounded deques drop samples older than
+        # EYE_HISTORY_LEN on their own. Only the thresholded open flag is
+        # kept - nothing reads past EAR values
+        for eye, (ex, ey), is_open in ((history['left'], left_eye, left_open),
+                                       (history['right'], right_eye, right_open)):
+            self.update_eye_blinks(eye, is_open, frame_time)
+            eye['x'].append(ex)
+            eye['y'].append(ey)
+            eye['open'].append(is_open)
+            eye['time'].append(frame_time)
         
         # Calculate movement for each eye
-        left_movement = self.calculate_eye_movement(history['left']['positions'])
-        right_movement = self.calculate_eye_movement(history['right']['positions'])
+        left_movement = self.calculate_eye_movement(history['left'])
+        right_movement = self.calculate_eye_movement(history['right'])
         
         # Detect blinks for each eye (individual)
-        left_blinks = self.detect_eye_blinks(history['left']['positions'])
-        right_blinks = self.detect_eye_blinks(history['right']['positions'])
+        left_blinks = self.detect_eye_blinks(history['left'])
+        right_blinks = self.detect_eye_blinks(history['right'])
         
         # Detect synchronized blinks (real blinks - both eyes together)
-        synchronized_blinks = self.detect_synchronized_blinks(
-            history['left']['positions'],
-            history['right']['positions']
-        )
+        synchronized_blinks = self.detect_synchronized_blinks(history)
         
         return {
             'left': {
                 'position': left_eye,
-                'ear': round(left_ear, 3),
+                'ear': left_ear,
                 'open': left_open,
                 'movement': left_movement,
                 'individual_blinks': left_blinks,  # Individual eye blinks
@@ -192,7 +229,7 @@ class EyeTracker:
             },
             'right': {
                 'position': right_eye,
-                'ear': round(right_ear, 3),
+                'ear': right_ear,
                 'open': right_open,
                 'movement': right_movement,
                 'individual_blinks': right_blinks,  # Individual eye blinks
@@ -203,162 +240,106 @@ class EyeTracker:
             'synchronized_blink_count': synchronized_blinks  # Real blink count
         }
     
-    def calculate_eye_movement(self, positions):
+    def calculate_eye_movement(self, eye):
         """Calculate eye movement metrics"""
-        if len(positions) < 2:
+        if len(eye['time']) < 2:
             return {'speed': 0, 'distance': 0, 'direction': 'Stable'}
         
-        recent = positions[-5:] if len(positions) >= 5 else positions
+        # One pass over consecutive pairs of the newest 5 samples; the last
+        # step's dx/dy also gives the direction
+        xs, ys, times = _newest(eye['x'], 5), _newest(eye['y'], 5), _newest(eye['time'], 5)
         total_distance = 0
         speeds = []
+        dx = dy = 0
         
-        for i in range(1, len(recent)):
-            prev = recent[i-1]
-            curr = recent[i]
+        for i in range(1, len(times)):
+            dx = xs[i] - xs[i-1]
+            dy = ys[i] - ys[i-1]
+            dt = times[i] - times[i-1]
             
-            dx = curr['position'][0] - prev['position'][0]
-            dy = curr['position'][1] - prev['position'][1]
-            dt = curr['time'] - prev['time']
-            
-            distance = math.sqrt(dx**2 + dy**2)
+            distance = hypot(dx, dy)
             total_distance += distance
             
             if dt > 0:
-                speed = distance / dt
-                speeds.append(speed)
+                speeds.append(distance / dt)
         
         avg_speed = sum(speeds) / len(speeds) if speeds else 0
-        
-        # Get direction from last movement
-        if len(recent) >= 2:
-            last = recent[-1]
-            prev = recent[-2]
-            dx = last['position'][0] - prev['position'][0]
-            dy = last['position'][1] - prev['position'][1]
-            direction = self.get_movement_direction(dx, dy)
-        else:
-            direction = 'Stable'
+        direction = self.get_movement_direction(dx, dy)
         
         return {
-            'speed': round(avg_speed, 2),
-            'total_distance': round(total_distance, 2),
+            'speed': avg_speed,
+            'total_distance': total_distance,
             'direction': direction
         }
     
-    def detect_eye_blinks(self, positions):
+    def update_eye_blinks(self, eye, is_open, t):
+        """Advance an eye's blink state by one sample, before the sample is appended"""
+        # Only open/closed transitions matter: a close starts a blink and the
+        # next open ends it
+        opens = eye['open']
+        if opens and is_open != opens[-1]:
+            if not is_open:
+                # Eye just closed
+                eye['blink_start'] = (eye['seq'], t)
+            elif eye['blink_start'] is not None:
+                # Eye just opened after being closed - complete blink. Only
+                # count if blink duration is reasonable (50ms to 500ms)
+                start_seq, start_time = eye['blink_start']
+                if 0.05 <= t - start_time <= 0.5:
+                    eye['blinks'].append(start_seq)
+                eye['blink_start'] = None
+        eye['seq'] += 1
+    
+    def detect_eye_blinks(self, eye):
         """Count blinks for an eye - only counts complete close-open cycles"""
-        if len(positions) < 3:
-            return 0
-        
-        blink_count = 0
-        in_blink = False
-        blink_start_time = None
-        
-        for i in range(1, len(positions)):
-            current = positions[i]
-            previous = positions[i-1]
-            
-            # Eye just closed
-            if not current['open'] and previous['open']:
-                in_blink = True
-                blink_start_time = current['time']
-            # Eye just opened after being closed - complete blink
-            elif current['open'] and in_blink:
-                # Only count if blink duration is reasonable (50ms to 500ms)
-                if blink_start_time:
-                    blink_duration = current['time'] - blink_start_time
-                    if 0.05 <= blink_duration <= 0.5:  # Valid blink duration
-                        blink_count += 1
-                in_blink = False
-                blink_start_time = None
-        
-        return blink_count
+        # Blinks count while their closing sample is in the window and has a
+        # sample before it, i.e. is newer than the oldest kept sample
+        return _drop_expired(eye['blinks'], eye['seq'] - len(eye['open']))
     
-    def detect_synchronized_blinks(self, left_positions, right_positions):
-        """Detect synchronized blinks (both eyes close together) - this is the real blink count"""
-        if len(left_positions) < 3 or len(right_positions) < 3:
-            return 0
+    def update_synchronized_blinks(self, history, left_open, right_open, t):
+        """Advance the synchronized-blink state by one frame, before the samples are appended"""
+        sync = history['sync']
         
-        synchronized_blinks = 0
-        left_in_blink = False
-        right_in_blink = False
-        left_blink_start = None
-        right_blink_start = None
-        
-        # Find minimum length
-        min_len = min(len(left_positions), len(right_positions))
-        
-        for i in range(1, min_len):
-            left_curr = left_positions[i]
-            left_prev = left_positions[i-1]
-            right_curr = right_positions[i]
-            right_prev = right_positions[i-1]
-            
-            # Left eye blink detection
-            if not left_curr['open'] and left_prev['open']:
-                left_in_blink = True
-                left_blink_start = left_curr['time']
-            elif left_curr['open'] and left_in_blink:
-                left_in_blink = False
-                if left_blink_start:
-                    left_blink_duration = left_curr['time'] - left_blink_start
-                    # Reset if blink was too long (not a real blink)
-                    if left_blink_duration > 0.5:
-                        left_blink_start = None
+        for side, is_open in (('left', left_open), ('right', right_open)):
+            eye = history[side]
             
-            # Right eye blink detection
-            if not right_curr['open'] and right_prev['open']:
-                right_in_blink = True
-                right_blink_start = right_curr['time']
-            elif right_curr['open'] and right_in_blink:
-                right_in_blink = False
-                if right_blink_start:
-                    right_blink_duration = right_curr['time'] - right_blink_start
-                    # Reset if blink was too long (not a real blink)
-                    if right_blink_duration > 0.5:
-                        right_blink_start = None
+            # Forget a close once its sample leaves the window, as a rescan
+            # of the window would; otherwise it could pair with an in-window
+            # blink and both would expire together
+            oldest = eye['seq'] + 1 - min(len(eye['open']) + 1, EYE_HISTORY_LEN)
+            if sync[side + '_start'] is not None and sync[side + '_start'][0] <= oldest:
+                sync[side + '_start'] = None
+                sync[side + '_in'] = False
             
-            # Check for synchronized blink (both eyes closed at similar times)
-            if left_blink_start and right_blink_start:
-                time_diff = abs(left_blink_start - right_blink_start)
-                # If both eyes closed within 100ms of each other, it's a synchronized blink
-                if time_diff <= 0.1:
-                    # Check if both completed the blink
-                    if not left_in_blink and not right_in_blink:
-                        # Verify both blinks were valid duration
-                        left_duration = left_positions[i]['time'] - left_blink_start if i < len(left_positions) else 0
-                        right_duration = right_positions[i]['time'] - right_blink_start if i < len(right_positions) else 0
-                        
-                        if 0.05 <= left_duration <= 0.5 and 0.05 <= right_duration <= 0.5:
-                            synchronized_blinks += 1
-                            left_blink_start = None
-                            right_blink_start = None
-        
-        return synchronized_blinks
+            if not eye['open'] or is_open == eye['open'][-1]:
+                continue
+            if not is_open:
+                sync[side + '_in'] = True
+                sync[side + '_start'] = (eye['seq'], t)
+            elif sync[side + '_in']:
+                sync[side + '_in'] = False
+                # Reset if blink was too long (not a real blink)
+                if t - sync[side + '_start'][1] > 0.5:
+                    sync[side + '_start'] = None
+        
+        # Synchronized blink: both eyes closed within 100ms of each other,
+        # both have reopened, and both blinks were a valid duration
+        left_start, right_start = sync['left_start'], sync['right_start']
+        if (left_start is not None and right_start is not None
+                and not sync['left_in'] and not sync['right_in']
+                and abs(left_start[1] - right_start[1]) <= 0.1
+                and 0.05 <= t - left_start[1] <= 0.5 and 0.05 <= t - right_start[1] <= 0.5):
+            sync['blinks'].append(min(left_start[0], right_start[0]))
+            sync['left_start'] = sync['right_start'] = None
+    
+    def detect_synchronized_blinks(self, history):
+        """Detect synchronized blinks (both eyes close together) - this is the real blink count"""
+        left = history['left']
+        return _drop_expired(history['sync']['blinks'], left['seq'] - len(left['open']))
     
     def get_movement_direction(self, dx, dy):
         """Get movement direction"""
-        if abs(dx) < 1 and abs(dy) < 1:
-            return 'Stable'
-        
-        angle = math.degrees(math.atan2(dy, dx))
-        
-        if -22.5 <= angle < 22.5:
-            return 'Right'
-        elif 22.5 <= angle < 67.5:
-            return 'Down-Right'
-        elif 67.5 <= angle < 112.5:
-            return 'Down'
-        elif 112.5 <= angle < 157.5:
-            return 'Down-Left'
-        elif 157.5 <= angle or angle < -157.5:
-            return 'Left'
-        elif -157.5 <= angle < -112.5:
-            return 'Up-Left'
-        elif -112.5 <= angle < -67.5:
-            return 'Up'
-        else:
-            return 'Up-Right'
+        return _direction_label(dx, dy, 1)
 
 class HeadPoseTracker:
     def __init__(self):
@@ -370,54 +351,39 @@ class HeadPoseTracker:
             return {'pitch': 0, 'yaw': 0, 'roll': 0, 'orientation': 'Frontal'}
         
         x, y, w, h = face_box[:4]
-        face_center_x = x + w // 2
-        face_center_y = y + h // 2
         
-        # Roll (rotation around Z-axis) - from eye alignment
+        # Roll and yaw both come from the eyes, pitch from nose and forehead
+        roll = yaw = pitch = 0
         if 'left_eye' in landmarks and 'right_eye' in landmarks:
             left_eye = landmarks['left_eye']
             right_eye = landmarks['right_eye']
             
+            # Roll (rotation around Z-axis) - from eye alignment
             dy = right_eye[1] - left_eye[1]
             dx = right_eye[0] - left_eye[0]
-            
             if dx != 0:
-                roll = math.degrees(math.atan2(dy, dx))
-            else:
-                roll = 0
-        else:
-            roll = 0
-        
-        # Yaw (rotation around Y-axis) - left/right turn
-        if 'left_eye' in landmarks and 'right_eye' in landmarks:
-            eye_center_x = (landmarks['left_eye'][0] + landmarks['right_eye'][0]) / 2
-            offset = eye_center_x - face_center_x
+                roll = degrees(atan2(dy, dx))
+            
+            # Yaw (rotation around Y-axis) - left/right turn
+            offset = (left_eye[0] + right_eye[0]) / 2 - (x + w // 2)
             offset_ratio = offset / (w / 2) if w > 0 else 0
             yaw = offset_ratio * 30  # Approximate degrees
-        else:
-            yaw = 0
         
         # Pitch (rotation around X-axis) - up/down tilt
         if 'nose_tip' in landmarks and 'forehead' in landmarks:
-            nose = landmarks['nose_tip']
-            forehead = landmarks['forehead']
-            
-            vertical_offset = nose[1] - forehead[1]
-            face_height = h
-            pitch_ratio = vertical_offset / face_height if face_height > 0 else 0
+            vertical_offset = landmarks['nose_tip'][1] - landmarks['forehead'][1]
+            pitch_ratio = vertical_offset / h if h > 0 else 0
             
             # Normalize pitch (0 = looking straight, positive = looking up, negative = looking down)
             pitch = (pitch_ratio - 0.5) * 40  # Approximate degrees
-        else:
-            pitch = 0
         
         # Determine overall orientation
         orientation = self.determine_orientation(pitch, yaw, roll)
         
         return {
-            'pitch': round(pitch, 1),  # Up/Down
-            'yaw': round(yaw, 1),      # Left/Right
-            'roll': round(roll, 1),     # Tilt
+            'pitch': pitch,  # Up/Down
+            'yaw': yaw,      # Left/Right
+            'roll': roll,    # Tilt
             'orientation': orientation,
             'pitch_direction': 'Up' if pitch > 5 else ('Down' if pitch < -5 else 'Level'),
             'yaw_direction': 'Right' if yaw > 10 else ('Left' if yaw < -10 else 'Center'),
@@ -426,25 +392,8 @@ class HeadPoseTracker:
     
     def determine_orientation(self, pitch, yaw, roll):
         """Determine overall head orientation"""
+        # Common case first: every axis within its threshold
         if abs(pitch) < 10 and abs(yaw) < 10 and abs(roll) < 5:
             return 'Frontal'
         
-        parts = []
-        if pitch > 10:
-            parts.append('Looking Up')
-        elif pitch < -10:
-            parts.append('Looking Down')
-        
-        if yaw > 10:
-            parts.append('Right')
-        elif yaw < -10:
-            parts.append('Left')
-        
-        if roll > 5:
-            parts.append('Tilted Right')
-        elif roll < -5:
-            parts.append('Tilted Left')
-        
-        return ' '.join(parts) if parts else 'Frontal'
-
-
+        return _ORIENTATIONS[(pitch > 10) - (pitch < -10), (yaw > 10) - (yaw < -10), (roll > 5) - (roll < -5)]
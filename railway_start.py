@@ -1,20 +1,24 @@
 #!/usr/bin/env python3
 """Railway startup script that properly handles PORT environment variable"""
 import os
-import subprocess
 import sys
 
-# Debug: Print all environment variables that might be relevant
-print("=== Railway Startup Debug ===")
-print(f"PORT env var: {repr(os.environ.get('PORT'))}")
-print(f"All env vars with PORT: {[k for k in os.environ.keys() if 'PORT' in k.upper()]}")
+# Set RAILWAY_DEBUG to log the startup details; by default only problems
+# and the final port are printed
+DEBUG = bool(os.environ.get('RAILWAY_DEBUG'))
+
+if DEBUG:
+    # Print all environment variables that might be relevant
+    print("=== Railway Startup Debug ===")
+    print(f"PORT env var: {repr(os.environ.get('PORT'))}")
+    print(f"All env vars with PORT: {[k for k in os.environ.keys() if 'PORT' in k.upper()]}")
 
 # Get PORT from environment (Railway sets this automatically)
 port = os.environ.get('PORT')
 if not port:
     print("WARNING: PORT environment variable not set, using default 8080")
     port = '8080'
-else:
+elif DEBUG:
     print(f"Found PORT environment variable: {port}")
 
 # Validate port is a number
@@ -22,7 +26,8 @@ try:
     port_int = int(port)
     if port_int < 1 or port_int > 65535:
         raise ValueError(f"Port {port_int} is out of range")
-    print(f"Validated port: {port_int}")
+    if DEBUG:
+        print(f"Validated port: {port_int}")
 except ValueError as e:
     print(f"ERROR: Invalid PORT value '{port}': {e}")
     print(f"PORT type: {type(port)}, PORT repr: {repr(port)}")
@@ -36,24 +41,21 @@ cmd = [
     'app:app',
     '--bind', f'0.0.0.0:{port}',
     '--workers', '2',
-    '--threads', '2',
+    '--worker-class', 'gthread',
+    '--threads', '4',
     '--timeout', '120'
 ]
 
-print(f"Executing command: {' '.join(cmd)}")
+if DEBUG:
+    print(f"Executing command: {' '.join(cmd)}")
 
-# Execute gunicorn
+# Replace this process with gunicorn rather than running it as a child, so
+# gunicorn receives the platform's signals directly and no idle Python parent
+# stays resident. Output is flushed first since exec discards the buffers
+sys.stdout.flush()
 try:
-    result = subprocess.run(cmd, check=False)
-    print(f"Gunicorn exited with code: {result.returncode}")
-    sys.exit(result.returncode)
+    os.execvp(cmd[0], cmd)
 except FileNotFoundError as e:
     print(f"ERROR: gunicorn not found: {e}")
     print("Make sure it's installed in requirements.txt")
     sys.exit(1)
-except Exception as e:
-    print(f"ERROR: Unexpected error: {e}")
-    import traceback
-    traceback.print_exc()
-    sys.exit(1)
-
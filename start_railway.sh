@@ -17,5 +17,5 @@ if [ "$PORT" -lt 1 ] || [ "$PORT" -gt 65535 ]; then
 fi
 
 echo "Starting gunicorn on port $PORT"
-exec gunicorn app:app --bind "0.0.0.0:${PORT}" --workers 2 --threads 2 --timeout 120
+exec gunicorn app:app --bind "0.0.0.0:${PORT}" --workers 2 --worker-class gthread --threads 4 --timeout 120
 
@@ -463,15 +463,67 @@ class FaceDetectionApp {
                 const img = new Image();
                 img.onload = () => {
                     this.processedCtx.clearRect(0, 0, this.processedCanvas.width, this.processedCanvas.height);
-                    this.processedCtx.drawImage(img, 0, 0);
+                    // Processed frames may come back downscaled; stretch to the overlay
+                    this.processedCtx.drawImage(img, 0, 0, this.processedCanvas.width, this.processedCanvas.height);
+                    this.drawLabels(data.analysis);
                 };
                 img.src = 'data:image/jpeg;base64,' + data.processed_frame;
+            } else if (data.status === 'success' && data.analysis) {
+                // Server skipped rendering; draw the overlay from the returned boxes
+                this.drawDetections(data.analysis);
             }
         } catch (error) {
             console.error('Error processing frame:', error);
         }
     }
     
+    drawDetections(analysis) {
+        const ctx = this.processedCtx;
+        const canvas = this.processedCanvas;
+        ctx.clearRect(0, 0, canvas.width, canvas.height);
+        
+        // Boxes are in the server's processing resolution
+        const sx = canvas.width / (analysis.frame_width || canvas.width);
+        const sy = canvas.height / (analysis.frame_height || canvas.height);
+        const length = 25 * sx;
+        
+        ctx.strokeStyle = '#00ff00';
+        ctx.lineWidth = 3;
+        
+        // Corner brackets for every face in one path
+        ctx.beginPath();
+        for (const face of Object.values(analysis.faces || {})) {
+            if (!face.box) continue;
+            const x = face.box[0] * sx;
+            const y = face.box[1] * sy;
+            const w = face.box[2] * sx;
+            const h = face.box[3] * sy;
+            
+            ctx.moveTo(x + length, y); ctx.lineTo(x, y); ctx.lineTo(x, y + length);
+            ctx.moveTo(x + w - length, y); ctx.lineTo(x + w, y); ctx.lineTo(x + w, y + length);
+            ctx.moveTo(x + length, y + h); ctx.lineTo(x, y + h); ctx.lineTo(x, y + h - length);
+            ctx.moveTo(x + w - length, y + h); ctx.lineTo(x + w, y + h); ctx.lineTo(x + w, y + h - length);
+        }
+        ctx.stroke();
+        
+        this.drawLabels(analysis);
+    }
+    
+    drawLabels(analysis) {
+        // Face ID labels are always drawn client-side, even over server-rendered frames
+        const ctx = this.processedCtx;
+        const canvas = this.processedCanvas;
+        const sx = canvas.width / (analysis.frame_width || canvas.width);
+        const sy = canvas.height / (analysis.frame_height || canvas.height);
+        
+        ctx.fillStyle = '#00ff00';
+        ctx.font = '14px sans-serif';
+        for (const [faceId, face] of Object.entries(analysis.faces || {})) {
+            if (!face.box) continue;
+            ctx.fillText(`ID:${faceId}`, face.box[0] * sx + 5, face.box[1] * sy - 5);
+        }
+    }
+    
     startStatisticsPolling() {
         this.statsInterval = setInterval(async () => {
             try {